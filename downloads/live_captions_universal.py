@@ -5,12 +5,23 @@ if sys.platform == "win32":
     sys.coinit_flags = 0
 
 import subprocess
+import platform
 import threading
 import time
 import math
 import queue
+import random
 import re
-from difflib import SequenceMatcher
+import argparse
+import json
+import concurrent.futures
+import collections
+import bisect
+import functools
+import gc
+import socket
+import http.server
+import ipaddress
 
 def pip_install(packages):
     if not packages:
@@ -20,30 +31,32 @@ def pip_install(packages):
 def ensure_packages():
     needs = []
     
-    try:
-        import comtypes
-        if sys.version_info >= (3, 13):
-            try:
-                version = comtypes.__version__
-                major, minor, patch = map(int, version.split('.')[:3])
-                if (major, minor, patch) <= (1, 4, 7):
+    if sys.platform == "win32":
+        try:
+            import comtypes
+            if sys.version_info >= (3, 13):
+                try:
+                    version = comtypes.__version__
+                    major, minor, patch = map(int, version.split('.')[:3])
+                    if (major, minor, patch) <= (1, 4, 7):
+                        needs.append("comtypes>=1.4.8")
+                except Exception:
                     needs.append("comtypes>=1.4.8")
-            except Exception:
-                needs.append("comtypes>=1.4.8")
-    except Exception:
-        needs.append("comtypes>=1.4.8")
+        except Exception:
+            needs.append("comtypes>=1.4.8")
     
     if needs:
         pip_install(needs)
     
     packages_to_check = [
-        ("pycaw", "pycaw"),
         ("psutil", "psutil"),
-        ("pyaudiowpatch", "PyAudioWPatch"),
-        ("numpy", "numpy"),
-        ("torch", "torch"),
-        ("whisper", "openai-whisper")
+        ("numpy", "numpy")
     ]
+    if sys.platform == "win32":
+        packages_to_check += [
+            ("pycaw", "pycaw"),
+            ("pyaudiowpatch", "PyAudioWPatch")
+        ]
     
     needs = []
     for module_name, package_name in packages_to_check:
@@ -55,27 +68,100 @@ def ensure_packages():
     if needs:
         pip_install(needs)
 
+def ensure_decoder():
+    # torch and whisper are large, so only the paths that decode install and import them.
+    global torch, whisper
+    if whisper is not None:
+        return
+    needs = []
+    for module_name, package_name in (("torch", "torch"), ("whisper", "openai-whisper")):
+        try:
+            __import__(module_name)
+        except Exception:
+            needs.append(package_name)
+    pip_install(needs)
+    import torch
+    import whisper
+
 ensure_packages()
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, font
-from pycaw.pycaw import AudioUtilities, IAudioMeterInformation
 import psutil
-import pyaudiowpatch as pyaudio
 import numpy as np
-import whisper
 import ctypes
-from ctypes import windll, byref, c_int
 
+torch = None
+whisper = None
+
+if sys.platform == "win32":
+    from pycaw.pycaw import AudioUtilities, IAudioMeterInformation, IAudioSessionControl2
+    import pyaudiowpatch as pyaudio
+    from ctypes import windll, byref, c_int
+
+BROADCAST_HOST = "127.0.0.1"
+BROADCAST_LOOPBACK_NAMES = ("localhost", "127.0.0.1", "::1")
+BROADCAST_PORT = 8765
+BROADCAST_CLIENT_QUEUE = 64
+BROADCAST_KEEPALIVE_SECONDS = 15.0
+BROADCAST_WRITE_TIMEOUT = 5.0
+BROADCAST_TEXT_CHARS = 600
+BROADCAST_BENCH_SNDBUF = 8192
+METRICS_BUCKETS_MS = (0.5, 1, 2, 5, 10, 16, 25, 33, 50, 100, 250, 500, 1000, 2500, 5000)
+PROFILE_SECONDS = 5.0
+PROFILE_INTERVAL_SECONDS = 0.005
+STATS_REFRESH_MS = 500
 REFRESH_MS = 100
+METER_REFRESH_MS = 250
+CAPTION_EVENT = "<<CaptionReady>>"
 MIN_DB_DISPLAY = -60.0
+NAME_REVALIDATE_SNAPSHOTS = 50
 TRANSCRIBE_THRESHOLD = 0.01
+GATE_HOLD_SECONDS = 1.5
+GATE_STALE_SECONDS = 2.0
+CAPTION_ALLOW = []
+CAPTION_DENY = []
+CAPTION_BACKGROUND = ["System Sounds"]
 SAMPLE_RATE = 16000
 CHUNK_SECONDS = 1.2
 MODEL_NAME = "base"
 PYAUDIO_CHUNK = 4096
 MIN_AUDIO_LENGTH = 0.6
 OVERLAP_SECONDS = 0.4
+DEFAULT_SOURCES = ["default"]
+BATCH_DECODE_MAX = 4
+BATCH_COALESCE_SECONDS = 0.08
+BATCH_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma", ".mp4", ".mkv", ".webm", ".mov"}
+BATCH_FORMATS = ("srt", "vtt", "jsonl")
+BATCH_MAX_SEGMENT_SECONDS = 28.0
+BATCH_MIN_SEGMENT_SECONDS = 5.0
+BATCH_MIN_SILENCE_SECONDS = 0.3
+BATCH_SILENCE_DB = -40.0
+BATCH_FRAME_SECONDS = 0.03
+SETTINGS_DIR = os.path.join(os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"), "AccessibilityPlatform")
+CAPTION_SETTINGS = {"model": MODEL_NAME, "chunk_seconds": CHUNK_SECONDS}
+WHISPER_MODELS = ("tiny", "tiny.en", "base", "base.en", "small", "small.en", "medium", "medium.en", "large-v1", "large-v2", "large-v3", "large", "turbo")
+CAPTION_LIMITS = {"model": WHISPER_MODELS, "chunk_seconds": (MIN_AUDIO_LENGTH, 10.0)}
+CALIBRATE_MODELS = ("tiny", "base", "small", "medium")
+CALIBRATE_CPU_MODELS = ("tiny", "base", "small")
+CALIBRATE_CHUNKS = (1.0, 1.2, 1.6, 2.0)
+CALIBRATE_FALLBACK_CHUNK = 3.0
+CALIBRATE_TARGET_RTF = 0.5
+CALIBRATE_RUNS = 3
+RECORDER_BUFFER_SECONDS = 30.0
+TRANSCRIPT_KEEP_CHARS = 4000
+TRANSCRIPT_OVERLAP_TOKENS = 10
+TEXT_TOKEN_CACHE = 8192
+FILLER_WORDS = ("um", "umm", "uh", "uhh", "erm", "er", "hmm", "mm", "mhm")
+WHISPER_TIME_PRECISION = 0.02
+SUBTITLE_FORMATS = ("srt", "vtt")
+MEMORY_CHECK_SECONDS = 30.0
+MEMORY_TRIM_SECONDS = 300.0
+SOAK_HOURS = 8.0
+SOAK_SAMPLE_SECONDS = 60.0
+SOAK_MIN_SAMPLES = 60
+SOAK_WARMUP_FRACTION = 0.1
+SOAK_MAX_GROWTH_MB = 32.0
 
 COLORS = {
     "bg_main": "#050505",
@@ -90,112 +176,706 @@ COLORS = {
     "transparent_overlay": "#0F0F0F" 
 }
 
-def get_sessions_peaks():
-    out = []
-    sessions = AudioUtilities.GetAllSessions()
-    for s in sessions:
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def snapshot(self):
+        return self.value
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets=METRICS_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["inf"], self.counts))
+        }
+
+class Metrics:
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, kind):
+        item = self._items.get(name)
+        if item is None:
+            with self._lock:
+                item = self._items.setdefault(name, kind())
+        return item
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._items.items())
+        return {name: item.snapshot() for name, item in items}
+
+    def format_lines(self):
+        lines = []
+        for name, value in self.snapshot().items():
+            if isinstance(value, dict):
+                lines.append(f"{name:<22} p50 {value['p50']:>6.1f}  p95 {value['p95']:>6.1f}  max {value['max']:>7.1f}")
+            elif isinstance(value, float):
+                lines.append(f"{name:<22} {value:>10.2f}")
+            else:
+                lines.append(f"{name:<22} {value:>10}")
+        return lines
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"time": time.time(), "metrics": self.snapshot()}, f, indent=2)
+        return path
+
+metrics = Metrics()
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, path, seconds=PROFILE_SECONDS):
+        if self.is_running():
+            return False
+        self._thread = threading.Thread(target=self._run, args=(path, seconds), daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, path, seconds):
+        own = threading.get_ident()
+        stacks = collections.Counter()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(parts))] += 1
+            time.sleep(self.interval)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def trim_memory():
+    gc.collect()
+    if torch is not None and cuda_available():
+        torch.cuda.empty_cache()
+    try:
+        if sys.platform.startswith("linux"):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        elif sys.platform == "win32":
+            ctypes.cdll.msvcrt._heapmin()
+    except (OSError, AttributeError):
+        pass
+
+class MemoryWatchdog:
+    def __init__(self, budget_mb=None, steps=(), trim_seconds=MEMORY_TRIM_SECONDS):
+        self.budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.steps = list(steps)
+        self.level = 0
+        self.trim_seconds = trim_seconds
+        self._last_trim = time.monotonic()
+        self._process = psutil.Process()
+        self._rss = metrics.gauge("rss_mb")
+        self._level = metrics.gauge("memory_level")
+        self._trims = metrics.counter("memory_trims")
+
+    def rss(self):
+        return self._process.memory_info().rss
+
+    def check(self):
+        now = time.monotonic()
+        rss = self.rss()
+        over = self.budget is not None and rss > self.budget
+        if over or now - self._last_trim >= self.trim_seconds:
+            trim_memory()
+            self._trims.inc()
+            self._last_trim = now
+            rss = self.rss()
+        if self.budget is not None and rss > self.budget and self.level < len(self.steps):
+            self.steps[self.level]()
+            self.level += 1
+            self._level.set(self.level)
+        self._rss.set(rss / 1048576.0)
+        return rss
+
+def soak_verdict(samples, warmup_fraction=SOAK_WARMUP_FRACTION, max_growth_mb=SOAK_MAX_GROWTH_MB):
+    steady = [rss for _, rss in samples[int(len(samples) * warmup_fraction):]]
+    if len(steady) < 4:
+        return True, 0.0
+    quarter = len(steady) // 4
+    head, tail = steady[:quarter], steady[-quarter:]
+    growth = max(max(tail) - max(head), min(tail) - min(head)) / 1048576.0
+    return growth <= max_growth_mb, growth
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+class SettingsStore:
+    def __init__(self, name, defaults, path=None, limits=None):
+        self.path = path or os.path.join(SETTINGS_DIR, f"{name}.json")
+        self.defaults = dict(defaults)
+        self.limits = dict(limits or {})
+        self.values = dict(defaults)
+        self.calibration = None
+        self.machine = machine_id()
+        self._data = {}
+
+    def _accepts(self, key, value):
+        default = self.defaults.get(key)
+        if key not in self.defaults or isinstance(value, bool) != isinstance(default, bool):
+            return False
+        if isinstance(default, float):
+            ok = isinstance(value, (int, float))
+        else:
+            ok = isinstance(value, type(default))
+        # Limits are allowed choices for strings and an inclusive (low, high) range for numbers.
+        limit = self.limits.get(key)
+        if not ok or limit is None:
+            return ok
+        if isinstance(default, str):
+            return value in limit
+        return limit[0] <= value <= limit[1]
+
+    def load(self):
+        t0 = time.perf_counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._data = data if isinstance(data, dict) else {}
+        entry = self._data.get("machines", {}).get(self.machine) or {}
+        for key, value in (entry.get("values") or {}).items():
+            if self._accepts(key, value):
+                self.values[key] = value
+        self.calibration = entry.get("calibration")
+        metrics.gauge("settings_load_ms").set((time.perf_counter() - t0) * 1000.0)
+        return self
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def update(self, **values):
+        for key, value in values.items():
+            if self._accepts(key, value):
+                self.values[key] = value
+
+    def save(self):
+        machines = self._data.setdefault("machines", {})
+        machines[self.machine] = {"values": self.values, "calibration": self.calibration}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        return self.path
+
+class SessionMeter:
+    def snapshot(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class PycawSessionMeter(SessionMeter):
+    def __init__(self):
+        self._manager = None
+        self._meters = {}
+        self._names = {}
+        self._snapshots = 0
+
+    def _session_manager(self):
+        if self._manager is None:
+            self._manager = AudioUtilities.GetAudioSessionManager()
+        return self._manager
+
+    def _process_name(self, pid):
+        name = self._names.get(pid)
+        if name is None:
+            try:
+                name = psutil.Process(pid).name()
+            except Exception:
+                name = "Unknown"
+            self._names[pid] = name
+        return name
+
+    def _evict(self, live_keys, live_pids):
+        for key in [k for k in self._meters if k not in live_keys]:
+            del self._meters[key]
+        for pid in [p for p in self._names if p not in live_pids]:
+            del self._names[pid]
+        self._snapshots += 1
+        if self._snapshots % NAME_REVALIDATE_SNAPSHOTS == 0:
+            for pid in [p for p in self._names if not psutil.pid_exists(p)]:
+                del self._names[pid]
+
+    def snapshot(self):
         try:
-            ctl = s._ctl
-            meter = ctl.QueryInterface(IAudioMeterInformation)
-            peak = meter.GetPeakValue()
+            enumerator = self._session_manager().GetSessionEnumerator()
+            count = enumerator.GetCount()
         except Exception:
-            peak = 0.0
-        pid = None
-        pname = "System Sounds"
-        if s.Process:
+            self.close()
+            raise
+        out = []
+        live_keys = set()
+        live_pids = set()
+        for i in range(count):
+            try:
+                ctl = enumerator.GetSession(i)
+                ctl2 = ctl.QueryInterface(IAudioSessionControl2)
+                pid = ctl2.GetProcessId()
+                key = ctl2.GetSessionInstanceIdentifier()
+            except Exception:
+                continue
+            live_keys.add(key)
+            meter = self._meters.get(key)
+            if meter is None:
+                try:
+                    meter = ctl.QueryInterface(IAudioMeterInformation)
+                    self._meters[key] = meter
+                except Exception:
+                    meter = None
             try:
-                pid = s.Process.pid
-                pname = psutil.Process(pid).name()
+                peak = meter.GetPeakValue() if meter is not None else 0.0
             except Exception:
-                pname = getattr(s.Process, "name", "Unknown")
-        out.append((pid, pname, float(peak)))
-    return out
+                peak = 0.0
+                self._meters.pop(key, None)
+            if pid:
+                live_pids.add(pid)
+                pname = self._process_name(pid)
+            else:
+                pid = None
+                pname = "System Sounds"
+            out.append((pid, pname, float(peak)))
+        self._evict(live_keys, live_pids)
+        return out
+
+    def close(self):
+        self._manager = None
+        self._meters.clear()
+        self._names.clear()
+
+class FakeSessionMeter(SessionMeter):
+    def __init__(self, sessions=24, active_ratio=0.25, churn=0.01, seed=0):
+        self.active_ratio = active_ratio
+        self.churn = churn
+        self._rng = random.Random(seed)
+        self._next_pid = 1000
+        self._live = {}
+        for _ in range(sessions):
+            self._spawn()
+
+    def _spawn(self):
+        pid = self._next_pid
+        self._next_pid += 1
+        active = self._rng.random() < self.active_ratio
+        self._live[pid] = [f"app{pid}.exe", self._rng.random() if active else 0.0, active]
+
+    def snapshot(self):
+        rng = self._rng
+        for pid in list(self._live):
+            if rng.random() < self.churn:
+                del self._live[pid]
+                self._spawn()
+        out = [(None, "System Sounds", 0.0)]
+        for pid, state in self._live.items():
+            if state[2]:
+                state[1] = min(1.0, max(0.0, state[1] + rng.uniform(-0.1, 0.1)))
+            out.append((pid, state[0], state[1]))
+        return out
+
+def format_level(peak):
+    db = linear_to_db(peak)
+    if db < MIN_DB_DISPLAY:
+        db = MIN_DB_DISPLAY
+    
+    bars = int((db + 60) / 6)
+    bars = max(0, min(10, bars))
+    visual_bar = "│" * bars
+    visual_bar = visual_bar.ljust(10, "·")
+    
+    return f"{visual_bar} {db:.0f} DB"
+
+class SessionTable:
+    def __init__(self):
+        self.rows = {}
+
+    def update(self, sessions):
+        agg = {}
+        for pid, pname, peak in sessions:
+            name = normalize_process_name(pname)
+            if peak > agg.get(name, -1.0):
+                agg[name] = peak
+        
+        rows = {}
+        added = []
+        changed = []
+        for name, peak in sorted(agg.items(), key=lambda x: x[1], reverse=True):
+            level = format_level(peak)
+            rows[name] = level
+            prev = self.rows.get(name)
+            if prev is None:
+                added.append((name, level))
+            elif prev != level:
+                changed.append((name, level))
+        removed = [name for name in self.rows if name not in rows]
+        self.rows = rows
+        
+        playing_count = sum(1 for peak in agg.values() if peak >= TRANSCRIBE_THRESHOLD)
+        return added, changed, removed, playing_count
+
+def cuda_available():
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+def normalize_process_name(name):
+    return name.upper().replace(".EXE", "").strip()
+
+class TranscriptionGate:
+    def __init__(self, allow=None, deny=None, threshold=TRANSCRIBE_THRESHOLD, hold_seconds=GATE_HOLD_SECONDS, background=CAPTION_BACKGROUND):
+        self.allow = {normalize_process_name(n) for n in (allow or [])}
+        self.deny = {normalize_process_name(n) for n in (deny or [])}
+        # Notification chimes are denied too, unless the user names them in allow.
+        self.deny |= {normalize_process_name(n) for n in background} - self.allow
+        self.threshold = threshold
+        self.hold_seconds = hold_seconds
+        self._last_audible = 0.0
+        self._last_update = 0.0
+
+    def is_allowed(self, pname):
+        name = normalize_process_name(pname)
+        if name in self.deny:
+            return False
+        return not self.allow or name in self.allow
+
+    def update(self, sessions):
+        now = time.monotonic()
+        for pid, pname, peak in sessions:
+            if peak >= self.threshold and self.is_allowed(pname):
+                self._last_audible = now
+                break
+        self._last_update = now
+
+    def is_open(self):
+        now = time.monotonic()
+        if now - self._last_update > GATE_STALE_SECONDS:
+            return True
+        return now - self._last_audible <= self.hold_seconds
+
+def whisper_options(device, word_timestamps=False):
+    return {
+        "language": "en",
+        "task": "transcribe",
+        "fp16": device == "cuda",
+        "condition_on_previous_text": True,
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": 0.0,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "word_timestamps": word_timestamps,
+    }
+
+def place_segments(segments, chunk_start, overlap=0.0):
+    # Map chunk-relative segments to wall-clock time and drop what the previous
+    # chunk already covered: words (or whole segments) centred in the overlap go.
+    # A kept segment's text can still start with overlapped words; those are
+    # trimmed against the committed transcript (TranscriptBuffer.unseen).
+    placed = []
+    for seg in segments:
+        words = seg.get("words")
+        if words:
+            words = [w for w in words if w["start"] + w["end"] >= 2 * overlap]
+            if not words:
+                continue
+            text = "".join(w["word"] for w in words).strip()
+            start, end = words[0]["start"], words[-1]["end"]
+        else:
+            if seg["start"] + seg["end"] < 2 * overlap:
+                continue
+            text = seg["text"].strip()
+            start, end = max(seg["start"], overlap), seg["end"]
+        if not text:
+            continue
+        cue = {"start": round(chunk_start + start, 3), "end": round(chunk_start + max(start, end), 3), "text": text}
+        if words:
+            cue["words"] = [{"word": w["word"].strip(), "start": round(chunk_start + w["start"], 3), "end": round(chunk_start + w["end"], 3)} for w in words]
+        placed.append(cue)
+    return placed
+
+def timestamp_segments(tokens, tokenizer, duration):
+    # Split a decoded token sequence on its <|t.tt|> timestamp tokens, the way
+    # transcribe() does, so batched decodes get segment times without a second pass.
+    segments = []
+    start = None
+    text = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text.append(token)
+            continue
+        t = (token - tokenizer.timestamp_begin) * WHISPER_TIME_PRECISION
+        if start is None:
+            start = t
+        elif text:
+            segments.append({"seek": 0, "start": start, "end": t, "text": tokenizer.decode(text), "tokens": text})
+            start, text = None, []
+        else:
+            start = t
+    if text:
+        segments.append({"seek": 0, "start": start or 0.0, "end": duration, "text": tokenizer.decode(text), "tokens": text})
+    return segments
 
 def linear_to_db(lin):
     if lin <= 1e-12:
         return -999.0
     return 20.0 * math.log10(lin)
 
-def clean_text(text):
-    text = text.replace('.', '')
-    words = text.split()
-    filtered_words = [
-        word for word in words
-        if len(re.sub(r'[^\w]', '', word)) > 1 or re.sub(r'[^\w]', '', word).upper() in ['I', 'A']
-    ]
-    text = ' '.join(filtered_words)
-    text = ' '.join(text.split())
-    text = re.sub(r'\s+([,!?;:])', r'\1', text)
-    text = re.sub(r'([,!?;:])\s*([,!?;:])', r'\1', text)
-    return text.strip()
-
-def find_best_overlap_position(prev_text, new_text):
-    if not prev_text or not new_text:
-        return 0
-    prev_clean = clean_text(prev_text.lower())
-    new_clean = clean_text(new_text.lower())
-    search_length = min(50, len(prev_clean))
-    prev_end = prev_clean[-search_length:]
-    best_match_length = 0
-    best_match_pos = 0
-    for i in range(len(new_clean)):
-        matcher = SequenceMatcher(None, prev_end, new_clean[i:i+search_length])
-        match = matcher.find_longest_match(0, len(prev_end), 0, min(search_length, len(new_clean)-i))
-        if match.size >= 3 and match.size > best_match_length:
-            best_match_length = match.size
-            best_match_pos = i + match.size
-    if best_match_length >= 3:
-        words_to_skip = len(new_clean[:best_match_pos].split())
-        original_words = new_text.split()
-        if words_to_skip > 0 and words_to_skip <= len(original_words):
-            skip_text = ' '.join(original_words[:words_to_skip])
-            return len(skip_text) + (1 if words_to_skip < len(original_words) else 0)
+TOKEN_PUNCT = ",!?;:"
+_PUNCT_RUN = re.compile(r"([,!?;:])[,!?;:]+")
+_NON_WORD = re.compile(r"[^\w]")
+_WORD_CHAR = re.compile(r"\w")
+
+@functools.lru_cache(maxsize=TEXT_TOKEN_CACHE)
+def normalize_token(word):
+    # Cached per distinct word: (display token, comparison key), or None to drop it.
+    token = _PUNCT_RUN.sub(r"\1", word.replace(".", "").lstrip(TOKEN_PUNCT))
+    key = _NON_WORD.sub("", token).lower()
+    if len(key) <= 1 and key not in ("i", "a"):
+        return None
+    return token, key
+
+class FillerFilter:
+    def __init__(self, words=FILLER_WORDS):
+        self.words = frozenset(words)
+
+    def __call__(self, tokens):
+        return [t for t in tokens if t[1] not in self.words]
+
+class ProfanityFilter:
+    def __init__(self, words):
+        self.words = frozenset(w.lower() for w in words)
+
+    def __call__(self, tokens):
+        return [(t[0][0] + _WORD_CHAR.sub("*", t[0][1:]), t[1]) if t[1] in self.words else t for t in tokens]
+
+class NumberFilter:
+    # Spoken numbers ("twenty one", "three hundred", "five five five") become digits; a lone
+    # "one" is left alone since it is usually a pronoun.
+    UNITS = {w: i for i, w in enumerate("zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen sixteen seventeen eighteen nineteen".split())}
+    TENS = {w: 10 * i for i, w in enumerate("twenty thirty forty fifty sixty seventy eighty ninety".split(), 2)}
+    SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+
+    def __call__(self, tokens):
+        out = []
+        run = []
+        for t in tokens:
+            if t[1] in self.UNITS or t[1] in self.TENS or (run and t[1] in self.SCALES):
+                run.append(t)
+                if t[0][-1] in TOKEN_PUNCT:
+                    self._flush(run, out)
+                continue
+            self._flush(run, out)
+            out.append(t)
+        self._flush(run, out)
+        return out
+
+    def _joins(self, group, key):
+        # A unit only follows a tens word, a scale word or (as a spelled digit
+        # string) other digits; tens only follow a scale word.
+        prev = group[-1][1]
+        if key in self.SCALES:
+            return prev not in self.SCALES or (prev == "hundred" and key != "hundred")
+        if key in self.TENS:
+            return prev in self.SCALES
+        value = self.UNITS[key]
+        if prev in self.TENS:
+            return 0 < value < 10
+        if prev in self.SCALES:
+            return True
+        return value < 10 and all(self.UNITS.get(k, 10) < 10 for _, k in group)
+
+    def _flush(self, run, out):
+        groups = []
+        for t in run:
+            if groups and self._joins(groups[-1], t[1]):
+                groups[-1].append(t)
+            else:
+                groups.append([t])
+        run.clear()
+        for group in groups:
+            keys = [k for _, k in group]
+            if keys == ["one"] or keys[0] in self.SCALES:
+                out.extend(group)
+                continue
+            if len(keys) > 1 and all(self.UNITS.get(k, 10) < 10 for k in keys):
+                digits = "".join(str(self.UNITS[k]) for k in keys)
+            else:
+                total = current = 0
+                for key in keys:
+                    if key == "hundred":
+                        current = max(current, 1) * 100
+                    elif key in self.SCALES:
+                        total += max(current, 1) * self.SCALES[key]
+                        current = 0
+                    else:
+                        current += self.UNITS.get(key) or self.TENS.get(key, 0)
+                digits = str(total + current)
+            tail = group[-1][0]
+            out.append((digits + tail[len(tail.rstrip(TOKEN_PUNCT)):], digits))
+
+class TextNormalizer:
+    def __init__(self, filters=()):
+        self.filters = list(filters)
+
+    def __call__(self, text):
+        tokens = [t for t in map(normalize_token, text.split()) if t is not None]
+        for f in self.filters:
+            tokens = f(tokens)
+        return tokens
+
+def overlap_tokens(recent_keys, new_keys):
+    # How many leading new tokens repeat the end of the transcript (chunk overlap):
+    # the longest suffix of recent_keys that is also a prefix of new_keys.
+    for size in range(min(len(recent_keys), len(new_keys)), 0, -1):
+        if new_keys[:size] == recent_keys[-size:] and sum(len(k) for k in new_keys[:size]) >= 3:
+            return size
     return 0
 
-def smart_merge(prev_text, new_text):
-    if not prev_text:
-        return clean_text(new_text)
-    if not new_text:
-        return prev_text
-    skip_chars = find_best_overlap_position(prev_text, new_text)
-    if skip_chars > 0:
-        new_text_trimmed = new_text[skip_chars:].strip()
-        merged = prev_text + (' ' + new_text_trimmed if new_text_trimmed else '')
-    else:
-        merged = prev_text + ' ' + new_text
-    return clean_text(merged)
-
-def remove_filler_duplicates(text):
-    words = text.split()
-    cleaned_words = []
-    i = 0
-    while i < len(words):
-        current = words[i]
-        if i + 1 < len(words):
-            next_word = words[i + 1]
-            current_clean = re.sub(r'[.,!?;:]', '', current).lower()
-            next_clean = re.sub(r'[.,!?;:]', '', next_word).lower()
-            if current_clean == next_clean and len(current_clean) <= 5:
-                cleaned_words.append(next_word if any(p in next_word for p in '.,!?;:') else current)
-                i += 2
+def parse_source_spec(spec):
+    if spec == "default":
+        return None, True, "OUTPUT"
+    if spec == "mic":
+        return None, False, "MIC"
+    if spec.startswith("mic:"):
+        name = spec[4:]
+        return name, False, name.upper()
+    return spec, True, spec.upper()
+
+def list_capture_sources():
+    p = pyaudio.PyAudio()
+    try:
+        wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
+        for i in range(p.get_device_count()):
+            info = p.get_device_info_by_index(i)
+            if info["hostApi"] != wasapi_info["index"] or info["maxInputChannels"] <= 0:
                 continue
-        cleaned_words.append(current)
-        i += 1
-    return ' '.join(cleaned_words)
+            kind = "output" if info.get("isLoopbackDevice") else "mic"
+            print(f"{kind:6}  {info['name']}")
+    finally:
+        p.terminate()
 
 class Recorder(threading.Thread):
-    def __init__(self, samplerate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    def __init__(self, samplerate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS, device_name=None, loopback=True, label="OUTPUT"):
         super().__init__(daemon=True)
         self.sr = samplerate
         self.chunk_seconds = chunk_seconds
+        self.device_name = device_name
+        self.loopback = loopback
+        self.label = label
         self.min_samples = int(MIN_AUDIO_LENGTH * samplerate)
         self.overlap_samples = int(OVERLAP_SECONDS * samplerate)
-        self.buffer = np.zeros((0,), dtype=np.float32)
+        self._ring = np.zeros(int(RECORDER_BUFFER_SECONDS * samplerate), dtype=np.float32)
+        self._chunk = np.zeros(int(chunk_seconds * samplerate), dtype=np.float32)
+        self._read_pos = 0
+        self._write_pos = 0
+        self._write_time = time.time()
+        self._chunk_end = 0
+        self.chunk_start = None
+        self.chunk_overlap = 0.0
         self.lock = threading.Lock()
         self._stop = threading.Event()
         self._recording_started = False
         self.p = None
         self.stream = None
+        self._buffer_gauge = metrics.gauge(f"buffer_seconds[{label}]")
+        self._read_errors = metrics.counter("audio_read_errors")
+        self._dropped = metrics.counter("audio_samples_dropped")
+
+    def _resolve_device(self, wasapi_info):
+        if not self.loopback:
+            if self.device_name is None:
+                return self.p.get_device_info_by_index(wasapi_info["defaultInputDevice"])
+            for i in range(self.p.get_device_count()):
+                info = self.p.get_device_info_by_index(i)
+                if (info["hostApi"] == wasapi_info["index"] and info["maxInputChannels"] > 0
+                        and not info.get("isLoopbackDevice") and self.device_name in info["name"]):
+                    return info
+            return None
+        speakers = self.p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
+        if self.device_name is None and speakers["isLoopbackDevice"]:
+            return speakers
+        name = self.device_name or speakers["name"]
+        for loopback in self.p.get_loopback_device_info_generator():
+            if name in loopback["name"]:
+                return loopback
+        return None
 
     def run(self):
         try:
@@ -204,42 +884,39 @@ class Recorder(threading.Thread):
                 wasapi_info = self.p.get_host_api_info_by_type(pyaudio.paWASAPI)
             except OSError:
                 return
-            default_speakers = self.p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
-            if not default_speakers["isLoopbackDevice"]:
-                for loopback in self.p.get_loopback_device_info_generator():
-                    if default_speakers["name"] in loopback["name"]:
-                        default_speakers = loopback
-                        break
-                else:
-                    return
+            device = self._resolve_device(wasapi_info)
+            if device is None:
+                return
             self.stream = self.p.open(
                 format=pyaudio.paInt16,
-                channels=default_speakers["maxInputChannels"],
-                rate=int(default_speakers["defaultSampleRate"]),
+                channels=device["maxInputChannels"],
+                rate=int(device["defaultSampleRate"]),
                 frames_per_buffer=PYAUDIO_CHUNK,
                 input=True,
-                input_device_index=default_speakers["index"]
+                input_device_index=device["index"]
             )
             self._recording_started = True
+            channels = device["maxInputChannels"]
+            current_rate = int(device["defaultSampleRate"])
+            scratch = np.zeros(PYAUDIO_CHUNK * channels, dtype=np.float32)
+            mono = np.zeros(PYAUDIO_CHUNK, dtype=np.float32)
+            grid = None
             while not self._stop.is_set():
                 try:
                     data = self.stream.read(PYAUDIO_CHUNK, exception_on_overflow=False)
                     audio_data = np.frombuffer(data, dtype=np.int16)
-                    audio_float = audio_data.astype(np.float32) / 32768.0
-                    if default_speakers["maxInputChannels"] > 1:
-                        audio_float = audio_float.reshape(-1, default_speakers["maxInputChannels"])
-                        audio_float = np.mean(audio_float, axis=1)
-                    current_rate = int(default_speakers["defaultSampleRate"])
+                    audio_float = scratch[:audio_data.shape[0]]
+                    np.multiply(audio_data, 1.0 / 32768.0, out=audio_float, casting="unsafe")
+                    if channels > 1:
+                        audio_float = np.mean(audio_float.reshape(-1, channels), axis=1, out=mono[:audio_float.shape[0] // channels])
                     if current_rate != self.sr:
-                        num_samples = int(len(audio_float) * self.sr / current_rate)
-                        audio_float = np.interp(
-                            np.linspace(0, len(audio_float), num_samples),
-                            np.arange(len(audio_float)),
-                            audio_float
-                        ).astype(np.float32)
-                    with self.lock:
-                        self.buffer = np.concatenate((self.buffer, audio_float))
+                        if grid is None or grid[1].shape[0] != audio_float.shape[0]:
+                            num_samples = int(len(audio_float) * self.sr / current_rate)
+                            grid = (np.linspace(0, len(audio_float), num_samples), np.arange(len(audio_float)))
+                        audio_float = np.interp(grid[0], grid[1], audio_float)
+                    self.write(audio_float)
                 except Exception:
+                    self._read_errors.inc()
                     if not self._stop.is_set():
                         time.sleep(0.01)
         except Exception:
@@ -263,39 +940,121 @@ class Recorder(threading.Thread):
     def is_recording(self):
         return self._recording_started
 
+    def write(self, samples):
+        capacity = self._ring.shape[0]
+        samples = samples[-capacity:]
+        n = samples.shape[0]
+        with self.lock:
+            pos = self._write_pos % capacity
+            first = min(n, capacity - pos)
+            self._ring[pos:pos + first] = samples[:first]
+            self._ring[:n - first] = samples[first:]
+            self._write_pos += n
+            self._write_time = time.time()
+            overflow = self._write_pos - self._read_pos - capacity
+            if overflow > 0:
+                self._read_pos += overflow
+                self._dropped.inc(overflow)
+            depth = self._write_pos - self._read_pos
+        self._buffer_gauge.set(depth / self.sr)
+
+    def set_capacity(self, seconds):
+        with self.lock:
+            depth = min(self._write_pos - self._read_pos, int(seconds * self.sr))
+            ring = np.zeros(int(seconds * self.sr), dtype=np.float32)
+            kept = np.arange(self._write_pos - depth, self._write_pos)
+            ring[kept % ring.shape[0]] = self._ring[kept % self._ring.shape[0]]
+            self._ring = ring
+            self._read_pos = self._write_pos - depth
+
     def get_chunk_if_ready(self):
+        # The returned chunk is a view into a reused array, valid until the next call.
+        # chunk_start is the wall-clock time of its first sample and chunk_overlap the
+        # leading seconds already handed out with the previous chunk.
         with self.lock:
-            if self.buffer.shape[0] >= self.min_samples:
-                max_samples = int(self.chunk_seconds * self.sr)
-                chunk_size = min(max_samples, self.buffer.shape[0])
-                chunk = self.buffer[:chunk_size].copy()
-                if self.buffer.shape[0] > self.overlap_samples:
-                    self.buffer = self.buffer[chunk_size - self.overlap_samples:].copy()
-                else:
-                    self.buffer = np.zeros((0,), dtype=np.float32)
-                return chunk
-        return None
+            depth = self._write_pos - self._read_pos
+            if depth < self.min_samples:
+                return None
+            capacity = self._ring.shape[0]
+            size = min(self._chunk.shape[0], depth)
+            pos = self._read_pos % capacity
+            first = min(size, capacity - pos)
+            self._chunk[:first] = self._ring[pos:pos + first]
+            self._chunk[first:size] = self._ring[:size - first]
+            self.chunk_start = self._write_time - (self._write_pos - self._read_pos) / self.sr
+            self.chunk_overlap = max(0, self._chunk_end - self._read_pos) / self.sr
+            self._chunk_end = self._read_pos + size
+            if depth > self.overlap_samples:
+                self._read_pos += size - self.overlap_samples
+            else:
+                self._read_pos = self._write_pos
+            return self._chunk[:size]
+
+class ReplayRecorder(Recorder):
+    def __init__(self, audio, samplerate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS, label="REPLAY"):
+        super().__init__(samplerate=samplerate, chunk_seconds=chunk_seconds, label=label)
+        self.audio = audio
+
+    def run(self):
+        self._recording_started = True
+        pos = 0
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            block = self.audio[pos:pos + PYAUDIO_CHUNK]
+            if block.shape[0] < PYAUDIO_CHUNK:
+                block = np.concatenate((block, self.audio[:PYAUDIO_CHUNK - block.shape[0]]))
+            self.write(block)
+            pos = (pos + PYAUDIO_CHUNK) % self.audio.shape[0]
+            next_time += PYAUDIO_CHUNK / self.sr
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
 
 class WhisperTranscriber(threading.Thread):
-    def __init__(self, recorder, output_queue, model_name=MODEL_NAME, device=None):
+    def __init__(self, recorder, output_queue, model_name=MODEL_NAME, device=None, gate=None, word_timestamps=False):
         super().__init__(daemon=True)
         self.recorder = recorder
         self.output_queue = output_queue
         self.model_name = model_name
+        self.gate = gate
+        self.word_timestamps = word_timestamps
         self._stop = threading.Event()
         self.model = None
+        self._pending_model = None
         self.device = device or ("cuda" if self._cuda_available() else "cpu")
+        self._decode_ms = metrics.histogram("decode_ms")
+        self._rtf = metrics.gauge("decode_rtf")
+        self._gated = metrics.counter("audio_chunks_gated")
+        self._silent = metrics.counter("audio_chunks_silent")
+        self._model_errors = metrics.counter("model_load_errors")
 
     def _cuda_available(self):
-        try:
-            import torch
-            return torch.cuda.is_available()
-        except Exception:
-            return False
+        return cuda_available()
 
     def load_model(self):
+        ensure_decoder()
         self.model = whisper.load_model(self.model_name, device=self.device)
 
+    def request_model(self, model_name):
+        self._pending_model = model_name
+
+    def _swap_model(self):
+        model_name, self._pending_model = self._pending_model, None
+        if model_name is None or model_name == self.model_name:
+            return
+        # Load first and only swap on success, so a failed load keeps captioning
+        # on the current model instead of killing the thread.
+        old = self.model, self.model_name
+        self.model_name = model_name
+        try:
+            self.load_model()
+        except Exception:
+            self.model, self.model_name = old
+            self._model_errors.inc()
+            return
+        del old
+        trim_memory()
+
     def run(self):
         try:
             self.load_model()
@@ -303,39 +1062,162 @@ class WhisperTranscriber(threading.Thread):
             return
         chunk_count = 0
         while not self._stop.is_set():
+            self._swap_model()
             chunk = self.recorder.get_chunk_if_ready()
             if chunk is None:
                 time.sleep(0.05)
                 continue
+            if self.recorder.loopback and self.gate is not None and not self.gate.is_open():
+                self._gated.inc()
+                continue
             peak = np.max(np.abs(chunk))
             if peak < 0.001:
+                self._silent.inc()
                 continue
             chunk_count += 1
             try:
-                audio = chunk.astype(np.float32)
-                result = self.model.transcribe(
-                    audio, 
-                    language="en",
-                    task="transcribe", 
-                    fp16=(self.device=="cuda"),
-                    condition_on_previous_text=True,
-                    beam_size=1,
-                    best_of=1,
-                    temperature=0.0,
-                    compression_ratio_threshold=2.4,
-                    logprob_threshold=-1.0,
-                    no_speech_threshold=0.6,
-                    word_timestamps=False
-                )
+                audio = chunk
+                t0 = time.perf_counter()
+                chunk_start, overlap = self.recorder.chunk_start, self.recorder.chunk_overlap
+                result = self.model.transcribe(audio, **whisper_options(self.device, self.word_timestamps))
+                elapsed = time.perf_counter() - t0
+                self._decode_ms.observe(elapsed * 1000.0)
+                self._rtf.set(elapsed * SAMPLE_RATE / audio.shape[0])
                 text = result.get("text", "").strip()
                 if text:
-                    self.output_queue.put({'text': text, 'chunk_id': chunk_count})
+                    segments = place_segments(result.get("segments", []), chunk_start, overlap)
+                    self.output_queue.put({'text': text, 'segments': segments, 'chunk_id': chunk_count, 'source': self.recorder.label, 'queued_at': time.perf_counter()})
             except Exception:
                 pass
 
     def stop(self):
         self._stop.set()
 
+class BatchedTranscriber(WhisperTranscriber):
+    def __init__(self, recorders, output_queue, model_name=MODEL_NAME, device=None, gate=None, max_batch=BATCH_DECODE_MAX, word_timestamps=False):
+        super().__init__(recorders[0], output_queue, model_name=model_name, device=device, gate=gate, word_timestamps=word_timestamps)
+        self.recorders = recorders
+        self.max_batch = max_batch
+        self.tokenizer = None
+        self._batch_size = metrics.gauge("decode_batch_size")
+
+    def load_model(self):
+        super().load_model()
+        self.tokenizer = whisper.tokenizer.get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages, language="en", task="transcribe")
+
+    def _collect(self, batch, skip):
+        for rec in self.recorders:
+            if rec in skip:
+                continue
+            chunk = rec.get_chunk_if_ready()
+            if chunk is None:
+                continue
+            skip.add(rec)
+            if rec.loopback and self.gate is not None and not self.gate.is_open():
+                self._gated.inc()
+                continue
+            if np.max(np.abs(chunk)) < 0.001:
+                self._silent.inc()
+                continue
+            batch.append((rec, chunk, rec.chunk_start, rec.chunk_overlap))
+
+    def _mels(self, chunks):
+        return torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels=self.model.dims.n_mels, device=self.model.device)
+            for chunk in chunks
+        ])
+
+    def _decode(self, mels, timestamps=True):
+        options = whisper.DecodingOptions(
+            language="en",
+            task="transcribe",
+            fp16=(self.device=="cuda"),
+            temperature=0.0,
+            without_timestamps=not timestamps
+        )
+        return whisper.decode(self.model, mels, options)
+
+    def _segments(self, result, mel, samples, chunk_start, overlap):
+        segments = timestamp_segments(result.tokens, self.tokenizer, samples / SAMPLE_RATE)
+        if self.word_timestamps and segments:
+            whisper.timing.add_word_timestamps(
+                segments=segments, model=self.model, tokenizer=self.tokenizer, mel=mel,
+                num_frames=samples // whisper.audio.HOP_LENGTH, last_speech_timestamp=0.0
+            )
+        return place_segments(segments, chunk_start, overlap)
+
+    def run(self):
+        try:
+            self.load_model()
+        except Exception:
+            return
+        chunk_count = 0
+        while not self._stop.is_set():
+            self._swap_model()
+            batch = []
+            seen = set()
+            self._collect(batch, seen)
+            if batch and len(seen) < len(self.recorders):
+                time.sleep(BATCH_COALESCE_SECONDS)
+                self._collect(batch, seen)
+            if not batch:
+                time.sleep(0.05)
+                continue
+            for i in range(0, len(batch), self.max_batch):
+                part = batch[i:i + self.max_batch]
+                try:
+                    t0 = time.perf_counter()
+                    mels = self._mels([item[1] for item in part])
+                    results = self._decode(mels)
+                    elapsed = time.perf_counter() - t0
+                except Exception:
+                    continue
+                self._decode_ms.observe(elapsed * 1000.0)
+                self._rtf.set(elapsed * SAMPLE_RATE / sum(item[1].shape[0] for item in part))
+                self._batch_size.set(len(part))
+                for (rec, chunk, chunk_start, overlap), mel, result in zip(part, mels, results):
+                    if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                        continue
+                    text = result.text.strip()
+                    if text:
+                        chunk_count += 1
+                        try:
+                            segments = self._segments(result, mel, chunk.shape[0], chunk_start, overlap)
+                        except Exception:
+                            segments = []
+                        self.output_queue.put({'text': text, 'segments': segments, 'chunk_id': chunk_count, 'source': rec.label, 'queued_at': time.perf_counter()})
+
+class GuiDispatcher:
+    def __init__(self, root, event_name=CAPTION_EVENT):
+        self.root = root
+        self.event_name = event_name
+        self.queue = queue.Queue()
+        self._pending = threading.Event()
+        self._closed = False
+
+    def put(self, item):
+        self.queue.put(item)
+        if self._closed or self._pending.is_set():
+            return
+        self._pending.set()
+        try:
+            self.root.event_generate(self.event_name, when="tail")
+        except Exception:
+            self._pending.clear()
+
+    def drain(self):
+        self._pending.clear()
+        items = []
+        try:
+            while True:
+                items.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def close(self):
+        self._closed = True
+
 class VoidButton(tk.Frame):
     def __init__(self, parent, text, command, destructive=False, width=100):
         super().__init__(parent, bg=COLORS["bg_main"], cursor="hand2")
@@ -382,12 +1264,104 @@ class VoidButton(tk.Frame):
         if self.command:
             self.command()
 
+class TranscriptBuffer:
+    # Only the tokens of each new chunk are normalized; the committed text is
+    # appended to and the last few keys are kept for overlap and repeat checks.
+    def __init__(self, keep_chars=TRANSCRIPT_KEEP_CHARS, normalizer=None):
+        self.keep_chars = keep_chars
+        self.normalizer = normalizer or TextNormalizer()
+        self.full_text = ""
+        self._recent = collections.deque(maxlen=TRANSCRIPT_OVERLAP_TOKENS)
+
+    def unseen(self, new_text):
+        # Normalized tokens of new_text minus the leading ones already committed.
+        tokens = self.normalizer(new_text)
+        return tokens[overlap_tokens([t[1] for t in self._recent], [t[1] for t in tokens]):]
+
+    def add(self, new_text):
+        tokens = self.unseen(new_text)
+        out = []
+        for t in tokens:
+            prev = out[-1] if out else (self._recent[-1] if self._recent else None)
+            if prev is not None and t[1] == prev[1] and len(t[1]) <= 5:
+                if t[0][-1] in TOKEN_PUNCT and prev[0][-1] not in TOKEN_PUNCT:
+                    if out:
+                        out[-1] = t
+                    else:
+                        self.full_text = self.full_text[:len(self.full_text) - len(prev[0])] + t[0]
+                        self._recent[-1] = t
+                continue
+            out.append(t)
+        if not out:
+            return
+        self._recent.extend(out)
+        text = " ".join(t[0] for t in out)
+        self.full_text = self.full_text + " " + text if self.full_text else text
+        if len(self.full_text) > 2 * self.keep_chars:
+            cut = self.full_text.find(" ", len(self.full_text) - self.keep_chars)
+            self.full_text = self.full_text[cut + 1:] if cut >= 0 else self.full_text[-self.keep_chars:]
+
+class TranscriptLane:
+    def __init__(self, parent, label, title, height=24, normalizer=None):
+        self.label = label
+        self.transcript = TranscriptBuffer(normalizer=normalizer)
+        
+        self.frame = tk.Frame(parent, bg=COLORS["bg_main"])
+        self.frame.pack(fill="both", expand=True)
+
+        self.header = tk.Label(
+            self.frame, 
+            text=title, 
+            fg=COLORS["text_sub"], 
+            bg=COLORS["bg_main"],
+            font=("Segoe UI Light", 8),
+            justify="left"
+        )
+        self.header.pack(anchor="w", pady=(0, 5))
+
+        self.text_border = tk.Frame(self.frame, bg=COLORS["border"], bd=1)
+        self.text_border.pack(fill="both", expand=True)
+
+        self.captions = scrolledtext.ScrolledText(
+            self.text_border, 
+            wrap="word", 
+            height=height,
+            font=("Segoe UI Light", 11), 
+            bg=COLORS["bg_main"], 
+            fg=COLORS["text_header"],
+            insertbackground="white",
+            bd=0,
+            padx=10,
+            pady=10,
+            selectbackground=COLORS["bg_secondary"],
+            selectforeground="white"
+        )
+        self.captions.pack(fill="both", expand=True, padx=1, pady=1)
+        self.captions.configure(state="disabled")
+
+    @property
+    def full_text(self):
+        return self.transcript.full_text
+
+    def add(self, new_text):
+        self.transcript.add(new_text)
+
+    def render(self):
+        self.captions.configure(state="normal")
+        self.captions.delete("1.0", "end")
+        
+        display_text = self.full_text[-2000:] if len(self.full_text) > 2000 else self.full_text
+        
+        self.captions.insert("1.0", display_text.upper())
+        self.captions.see("end")
+        self.captions.configure(state="disabled")
+
 class App:
-    def __init__(self, root):
+    def __init__(self, root, meter=None, gate=None, model_name=MODEL_NAME, sources=None, broadcaster=None, chunk_seconds=CHUNK_SECONDS, memory_budget=None, subtitles_dir=None, word_timestamps=False, text_filters=()):
         self.root = root
         self.root.overrideredirect(True)
         self.root.attributes("-topmost", True)
-        self.root.geometry("700x520")
+        self.root.geometry(f"700x{520 + 140 * (len(sources or DEFAULT_SOURCES) - 1)}")
         self.root.configure(bg=COLORS["border"])
         self.root.attributes("-alpha", 0.95)
         
@@ -433,6 +1407,9 @@ class App:
         self.btn_close = VoidButton(self.title_bar, "×", self.stop_and_close, destructive=True, width=30)
         self.btn_close.pack(side="right", padx=15, pady=5)
 
+        self.btn_stats = VoidButton(self.title_bar, "Stats", self.toggle_stats, width=60)
+        self.btn_stats.pack(side="right", pady=5)
+
         self.content = tk.Frame(self.main_container, bg=COLORS["bg_main"])
         self.content.pack(fill="both", expand=True, padx=20, pady=(0, 20))
 
@@ -486,37 +1463,13 @@ class App:
         self.tree.column("level", width=100, anchor="e")
         self.tree.pack(fill="both", expand=True, padx=1, pady=1)
 
-        self.frame_trans = tk.Frame(self.content, bg=COLORS["bg_main"])
-        self.frame_trans.pack(fill="both", expand=True)
-
-        self.lbl_trans_header = tk.Label(
-            self.frame_trans, 
-            text="TRANSCRIPT STREAM", 
-            fg=COLORS["text_sub"], 
-            bg=COLORS["bg_main"],
-            font=("Segoe UI Light", 8),
-            justify="left"
-        )
-        self.lbl_trans_header.pack(anchor="w", pady=(0, 5))
-
-        self.text_border = tk.Frame(self.frame_trans, bg=COLORS["border"], bd=1)
-        self.text_border.pack(fill="both", expand=True)
-
-        self.captions = scrolledtext.ScrolledText(
-            self.text_border, 
-            wrap="word", 
-            font=("Segoe UI Light", 11), 
-            bg=COLORS["bg_main"], 
-            fg=COLORS["text_header"],
-            insertbackground="white",
-            bd=0,
-            padx=10,
-            pady=10,
-            selectbackground=COLORS["bg_secondary"],
-            selectforeground="white"
-        )
-        self.captions.pack(fill="both", expand=True, padx=1, pady=1)
-        self.captions.configure(state="disabled")
+        self.sources = sources or DEFAULT_SOURCES
+        self.lanes = {}
+        for spec in self.sources:
+            label = parse_source_spec(spec)[2]
+            title = "TRANSCRIPT STREAM" if len(self.sources) == 1 else f"TRANSCRIPT STREAM | {label}"
+            self.lanes[label] = TranscriptLane(self.content, label, title, height=max(3, 24 // len(self.sources)), normalizer=TextNormalizer(text_filters))
+        self._dirty_lanes = set()
 
         self.status_bar = tk.Frame(self.main_container, bg=COLORS["bg_secondary"], height=25)
         self.status_bar.pack(fill="x")
@@ -533,19 +1486,48 @@ class App:
         )
         self.status_text.pack(side="left")
 
+        self.stats_label = tk.Label(
+            self.content,
+            text="",
+            fg=COLORS["text_sub"],
+            bg=COLORS["bg_main"],
+            font=("Consolas", 8),
+            justify="left",
+            anchor="w"
+        )
+        self.stats_visible = False
+        self.profiler = SamplingProfiler()
+        self._poll_ms = metrics.histogram("meter_poll_ms")
+        self._queue_wait_ms = metrics.histogram("queue_wait_ms")
+        self._render_ms = metrics.histogram("render_ms")
+        self.root.bind("<F8>", lambda e: self.toggle_stats())
+        self.root.bind("<F9>", lambda e: self.dump_profile())
+        self.root.bind("<F10>", lambda e: self.export_metrics())
+
         self._stop = False
         self._lock = threading.Lock()
         self._data = []
-        self.gui_queue = queue.Queue()
-        self.recorder = None
+        self.meter = meter or PycawSessionMeter()
+        self.session_table = SessionTable()
+        self.gate = gate or TranscriptionGate(CAPTION_ALLOW, CAPTION_DENY)
+        self.model_name = model_name
+        self.chunk_seconds = chunk_seconds
+        self.broadcaster = broadcaster
+        self.subtitles_dir = subtitles_dir
+        self.word_timestamps = word_timestamps
+        self.subtitles = {}
+        self.gui_queue = GuiDispatcher(self.root)
+        self.recorders = []
         self.transcriber = None
         self.pipeline_started = False
-        self.full_text = ""
+        self.watchdog = MemoryWatchdog(memory_budget, steps=(self._shed_history, self._shed_batching, self._shed_model))
         
         self.monitor_thread = threading.Thread(target=self._poll_loop, daemon=True)
         self.monitor_thread.start()
+        self.root.bind(CAPTION_EVENT, self._on_captions)
         self.root.after(500, self._start_pipeline)
-        self.root.after(REFRESH_MS, self._refresh_ui)
+        self.root.after(METER_REFRESH_MS, self._refresh_meters)
+        self.root.after(int(MEMORY_CHECK_SECONDS * 1000), self._check_memory)
 
     def start_move(self, event):
         self.x = event.x
@@ -565,95 +1547,133 @@ class App:
 
     def _poll_loop(self):
         while not self._stop:
+            t0 = time.perf_counter()
             try:
-                sessions = get_sessions_peaks()
+                sessions = self.meter.snapshot()
+                self.gate.update(sessions)
             except Exception:
                 sessions = []
             with self._lock:
                 self._data = sessions
+            self._poll_ms.observe((time.perf_counter() - t0) * 1000.0)
             time.sleep(REFRESH_MS / 1000.0)
 
-    def _refresh_ui(self):
+    def _refresh_meters(self):
         with self._lock:
             sessions = list(self._data)
         
-        agg = {}
-        for pid, pname, peak in sessions:
-            key = (pid, pname)
-            agg[key] = max(agg.get(key, 0.0), peak)
-        
-        items = [(pid, pname, peak) for (pid, pname), peak in agg.items()]
-        items.sort(key=lambda x: x[2], reverse=True)
-        
-        existing = {self.tree.set(child, "proc"): child for child in self.tree.get_children()}
-        seen = set()
-        playing_count = 0
-        
-        for pid, pname, peak in items:
-            pname_upper = pname.upper().replace(".EXE", "")
-            db = linear_to_db(peak)
-            if db < MIN_DB_DISPLAY:
-                db = MIN_DB_DISPLAY
-            
-            bars = int((db + 60) / 6)
-            bars = max(0, min(10, bars))
-            visual_bar = "│" * bars
-            visual_bar = visual_bar.ljust(10, "·")
-            
-            text_level = f"{visual_bar} {db:.0f} DB"
-            
-            seen.add(pname_upper)
-            
-            if pname_upper in existing:
-                self.tree.item(existing[pname_upper], values=(pname_upper, text_level))
-            else:
-                self.tree.insert("", "end", values=(pname_upper, text_level))
-            
-            if peak >= TRANSCRIBE_THRESHOLD:
-                playing_count += 1
+        added, changed, removed, playing_count = self.session_table.update(sessions)
         
-        for proc_name, iid in existing.items():
-            if proc_name not in seen:
-                try:
-                    self.tree.delete(iid)
-                except Exception:
-                    pass
+        for name in removed:
+            try:
+                self.tree.delete(name)
+            except Exception:
+                pass
+        for name, level in changed:
+            self.tree.item(name, values=(name, level))
+        for name, level in added:
+            self.tree.insert("", "end", iid=name, values=(name, level))
         
-        if self.recorder and self.recorder.is_recording():
+        if any(rec.is_recording() for rec in self.recorders):
             self.status_ind.config(fg=COLORS["accent_red"])
             status_str = f"LISTENING | ACTIVE SOURCES: {playing_count}"
+            if not self.gate.is_open() and any(rec.loopback for rec in self.recorders):
+                status_str += " | PAUSED"
         else:
             self.status_ind.config(fg=COLORS["text_dim"])
             status_str = "STANDBY"
             
         self.status_text.config(text=status_str)
         
-        try:
-            while True:
-                data = self.gui_queue.get_nowait()
-                self._process_transcription(data)
-        except queue.Empty:
-            pass
+        if not self.gui_queue.queue.empty():
+            self._on_captions()
         
         if not self._stop:
-            self.root.after(REFRESH_MS, self._refresh_ui)
+            self.root.after(METER_REFRESH_MS, self._refresh_meters)
 
-    def _process_transcription(self, data):
-        new_text = data['text']
-        new_text = remove_filler_duplicates(new_text)
-        self.full_text = smart_merge(self.full_text, new_text)
-        self.full_text = remove_filler_duplicates(self.full_text)
-        self._update_display()
+    def _on_captions(self, event=None):
+        batch = self.gui_queue.drain()
+        if not batch or self._stop:
+            return
+        t0 = time.perf_counter()
+        for data in batch:
+            if 'queued_at' in data:
+                self._queue_wait_ms.observe((t0 - data['queued_at']) * 1000.0)
+            self._process_transcription(data)
+        for lane in self._dirty_lanes:
+            lane.render()
+            if self.broadcaster is not None:
+                self.broadcaster.publish("committed", lane.label, lane.full_text[-BROADCAST_TEXT_CHARS:])
+        self._dirty_lanes.clear()
+        self._render_ms.observe((time.perf_counter() - t0) * 1000.0)
 
-    def _update_display(self):
-        self.captions.configure(state="normal")
-        self.captions.delete("1.0", "end")
-        
-        display_text = self.full_text[-2000:] if len(self.full_text) > 2000 else self.full_text
-        
-        self.captions.insert("1.0", display_text.upper())
-        self.captions.see("end")
-        self.captions.configure(state="disabled")
+    def _check_memory(self):
+        if self._stop:
+            return
+        self.watchdog.check()
+        self.root.after(int(MEMORY_CHECK_SECONDS * 1000), self._check_memory)
+
+    def _shed_history(self):
+        for recorder in self.recorders:
+            recorder.set_capacity(RECORDER_BUFFER_SECONDS / 3)
+        for lane in self.lanes.values():
+            lane.transcript.keep_chars = TRANSCRIPT_KEEP_CHARS // 2
+
+    def _shed_batching(self):
+        if isinstance(self.transcriber, BatchedTranscriber):
+            self.transcriber.max_batch = 1
+
+    def _shed_model(self):
+        if self.transcriber is not None:
+            self.transcriber.request_model("tiny")
+
+    def toggle_stats(self):
+        self.stats_visible = not self.stats_visible
+        if self.stats_visible:
+            self.stats_label.pack(fill="x", pady=(0, 10), before=self.frame_audio)
+            self._refresh_stats()
+        else:
+            self.stats_label.pack_forget()
+
+    def _refresh_stats(self):
+        if not self.stats_visible or self._stop:
+            return
+        lines = metrics.format_lines() + ["", "F8 HIDE | F9 PROFILE | F10 EXPORT"]
+        self.stats_label.config(text="\n".join(lines))
+        self.root.after(STATS_REFRESH_MS, self._refresh_stats)
+
+    def dump_profile(self):
+        path = os.path.abspath(time.strftime("live_captions_profile_%Y%m%d_%H%M%S.txt"))
+        if self.profiler.start(path):
+            self.status_text.config(text=f"PROFILING {PROFILE_SECONDS:.0f}S -> {os.path.basename(path).upper()}")
+
+    def export_metrics(self):
+        path = os.path.abspath(time.strftime("live_captions_metrics_%Y%m%d_%H%M%S.json"))
+        try:
+            metrics.export(path)
+            self.status_text.config(text=f"EXPORTED {os.path.basename(path).upper()}")
+        except Exception:
+            pass
+
+    def _process_transcription(self, data):
+        lane = self.lanes.get(data.get('source')) or next(iter(self.lanes.values()))
+        writer = self.subtitles.get(lane.label)
+        cues = []
+        if writer is not None:
+            # Word-timed cues were already cut at the overlap; segment cues carry its
+            # words in their text, so trim them against the lane before it commits.
+            for i, cue in enumerate(data.get('segments', ())):
+                if 'words' not in cue:
+                    tokens = lane.transcript.unseen(cue['text']) if i == 0 else lane.transcript.normalizer(cue['text'])
+                    cue = dict(cue, text=" ".join(t[0] for t in tokens))
+                if cue['text']:
+                    cues.append(cue)
+        lane.add(data['text'])
+        self._dirty_lanes.add(lane)
+        for cue in cues:
+            writer.add(cue)
+        if self.broadcaster is not None:
+            self.broadcaster.publish("tentative", lane.label, data['text'])
 
     def _start_pipeline(self):
         if self.pipeline_started:
@@ -663,38 +1683,926 @@ class App:
         self.status_text.config(text="LOADING MODEL (WHISPER)...")
         self.root.update()
         
-        self.recorder = Recorder(samplerate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS)
-        self.recorder.start()
+        if self.subtitles_dir is not None:
+            os.makedirs(self.subtitles_dir, exist_ok=True)
+            origin = time.time()
+            stamp = time.strftime("live_captions_%Y%m%d_%H%M%S", time.localtime(origin))
+            for label in self.lanes:
+                suffix = "" if len(self.lanes) == 1 else "_" + re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_").lower()
+                self.subtitles[label] = SubtitleWriter(os.path.join(self.subtitles_dir, stamp + suffix), SUBTITLE_FORMATS, origin=origin)
+        
+        for spec in self.sources:
+            device_name, loopback, label = parse_source_spec(spec)
+            recorder = Recorder(samplerate=SAMPLE_RATE, chunk_seconds=self.chunk_seconds, device_name=device_name, loopback=loopback, label=label)
+            recorder.start()
+            self.recorders.append(recorder)
         time.sleep(1.0)
         
-        self.transcriber = WhisperTranscriber(
-            recorder=self.recorder, 
-            output_queue=self.gui_queue, 
-            model_name=MODEL_NAME
-        )
+        if len(self.recorders) == 1:
+            self.transcriber = WhisperTranscriber(
+                recorder=self.recorders[0], 
+                output_queue=self.gui_queue, 
+                model_name=self.model_name,
+                gate=self.gate,
+                word_timestamps=self.word_timestamps
+            )
+        else:
+            self.transcriber = BatchedTranscriber(
+                recorders=self.recorders, 
+                output_queue=self.gui_queue, 
+                model_name=self.model_name,
+                gate=self.gate,
+                word_timestamps=self.word_timestamps
+            )
         self.transcriber.start()
 
     def stop(self):
         self._stop = True
+        self.gui_queue.close()
         try:
-            if self.recorder:
-                self.recorder.stop()
+            for recorder in self.recorders:
+                recorder.stop()
             if self.transcriber:
                 self.transcriber.stop()
         except Exception:
             pass
+        for writer in self.subtitles.values():
+            writer.close()
         self.monitor_thread.join(timeout=1.0)
+        self.meter.close()
+
+CAPTION_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Live Captions</title>
+<style>
+body { margin: 0; padding: 24px; background: transparent; color: #FFFFFF; font-family: 'Segoe UI Light', sans-serif; }
+.lane { margin-bottom: 24px; }
+.label { font-size: 11px; letter-spacing: 3px; color: #888888; }
+.text { font-size: 32px; line-height: 1.3; text-transform: uppercase; text-shadow: 0 0 6px #000000, 0 0 2px #000000; }
+.tentative { font-size: 18px; color: #888888; text-transform: uppercase; }
+</style>
+</head>
+<body>
+<div id="lanes"></div>
+<script>
+const lanes = {};
+function lane(name) {
+    if (!lanes[name]) {
+        const el = document.createElement("div");
+        el.className = "lane";
+        el.innerHTML = '<div class="label"></div><div class="text"></div><div class="tentative"></div>';
+        el.querySelector(".label").textContent = name;
+        document.getElementById("lanes").appendChild(el);
+        lanes[name] = el;
+    }
+    return lanes[name];
+}
+const source = new EventSource("/events");
+source.addEventListener("committed", e => {
+    const msg = JSON.parse(e.data);
+    lane(msg.lane).querySelector(".text").textContent = msg.text.slice(-240);
+});
+source.addEventListener("tentative", e => {
+    const msg = JSON.parse(e.data);
+    lane(msg.lane).querySelector(".tentative").textContent = msg.text;
+});
+</script>
+</body>
+</html>
+"""
+
+class BroadcastClient:
+    def __init__(self, size=BROADCAST_CLIENT_QUEUE):
+        self.queue = queue.Queue(maxsize=size)
+        self.closed = threading.Event()
+
+class CaptionBroadcaster:
+    def __init__(self, client_queue=BROADCAST_CLIENT_QUEUE):
+        self.client_queue = client_queue
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._last = {}
+        self.published = 0
+        self.dropped_clients = 0
+
+    def subscribe(self):
+        client = BroadcastClient(self.client_queue)
+        with self._lock:
+            for message in self._last.values():
+                client.queue.put_nowait(message)
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        client.closed.set()
+        with self._lock:
+            self._clients.discard(client)
 
-def main():
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, kind, lane, text):
+        payload = json.dumps({"type": kind, "lane": lane, "text": text, "time": time.time()})
+        message = f"event: {kind}\ndata: {payload}\n\n".encode("utf-8")
+        with self._lock:
+            if kind == "committed":
+                self._last[lane] = message
+            clients = list(self._clients)
+            self.published += 1
+        for client in clients:
+            try:
+                client.queue.put_nowait(message)
+            except queue.Full:
+                self.unsubscribe(client)
+                with self._lock:
+                    self.dropped_clients += 1
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients)
+            self._clients.clear()
+        for client in clients:
+            client.closed.set()
+
+class CaptionRequestHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/events", "/", "/index.html") and not self.server.host_allowed(self.headers.get("Host")):
+            # A DNS-rebinding page reaches us under its own domain name; refuse it
+            # before it can load the page or read the transcript.
+            self.send_error(403)
+            return
+        if path == "/events":
+            self._stream_events()
+        elif path in ("/", "/index.html"):
+            body = CAPTION_PAGE.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def _stream_events(self):
+        # Browsers send Origin on cross-site requests; only the page served here
+        # and origins named with --serve-origin may read the transcript.
+        origin = self.headers.get("Origin")
+        allowed = origin in self.server.origins
+        if origin and not allowed and origin != f"http://{self.headers.get('Host')}":
+            self.send_error(403)
+            return
+        if self.server.send_buffer:
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.server.send_buffer)
+        broadcaster = self.server.broadcaster
+        client = broadcaster.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            if allowed:
+                self.send_header("Access-Control-Allow-Origin", origin)
+                self.send_header("Vary", "Origin")
+            self.end_headers()
+            self.connection.settimeout(BROADCAST_WRITE_TIMEOUT)
+            while not client.closed.is_set():
+                try:
+                    message = client.queue.get(timeout=BROADCAST_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                self.wfile.write(message)
+        except Exception:
+            pass
+        finally:
+            broadcaster.unsubscribe(client)
+
+class CaptionServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, broadcaster, origins=(), send_buffer=None):
+        super().__init__(address, CaptionRequestHandler)
+        self.broadcaster = broadcaster
+        self.origins = frozenset(o.rstrip("/") for o in origins)
+        self.send_buffer = send_buffer
+        self.hosts = frozenset(h.lower() for h in (*BROADCAST_LOOPBACK_NAMES, address[0], self.server_address[0]))
+        self.any_address = address[0] in ("", "0.0.0.0", "::")
+
+    def host_allowed(self, host):
+        if not host:
+            return False
+        host = host.strip().lower()
+        if host.startswith("["):
+            host = host[1:].split("]", 1)[0]
+        elif host.count(":") == 1:
+            host = host.split(":", 1)[0]
+        if host in self.hosts:
+            return True
+        if self.any_address:
+            # Serving the LAN: viewers use this machine's IP, and a rebinding
+            # attack always arrives under a domain name, never an IP literal.
+            try:
+                ipaddress.ip_address(host)
+                return True
+            except ValueError:
+                pass
+        return False
+
+def start_caption_server(host=BROADCAST_HOST, port=BROADCAST_PORT, broadcaster=None, origins=(), send_buffer=None):
+    broadcaster = broadcaster or CaptionBroadcaster()
+    server = CaptionServer((host, port), broadcaster, origins=origins, send_buffer=send_buffer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, broadcaster
+
+def stop_caption_server(server):
+    server.broadcaster.close()
+    server.shutdown()
+    server.server_close()
+
+def format_timestamp(seconds, separator=","):
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{separator}{ms:03d}"
+
+class SubtitleWriter:
+    # Appends cues as they arrive; times are shifted by origin so a live session
+    # can be written against wall-clock cues and still start at 00:00:00.
+    def __init__(self, base_path, formats=BATCH_FORMATS, origin=0.0, flush=True):
+        self.origin = origin
+        self.flush = flush
+        self.count = 0
+        self.files = {fmt: open(f"{base_path}.{fmt}", "w", encoding="utf-8") for fmt in BATCH_FORMATS if fmt in formats}
+        if "vtt" in self.files:
+            self.files["vtt"].write("WEBVTT\n\n")
+
+    def add(self, cue):
+        self.count += 1
+        start, end = cue["start"] - self.origin, cue["end"] - self.origin
+        f = self.files.get("srt")
+        if f is not None:
+            f.write(f"{self.count}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{cue['text']}\n\n")
+        f = self.files.get("vtt")
+        if f is not None:
+            words = cue.get("words")
+            if words:
+                text = " ".join([words[0]["word"]] + [f"<{format_timestamp(w['start'] - self.origin, '.')}>{w['word']}" for w in words[1:]])
+            else:
+                text = cue["text"]
+            f.write(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n")
+        f = self.files.get("jsonl")
+        if f is not None:
+            f.write(json.dumps(cue) + "\n")
+        if self.flush:
+            for f in self.files.values():
+                f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_subtitles(base_path, cues, formats=BATCH_FORMATS):
+    with SubtitleWriter(base_path, formats, flush=False) as writer:
+        for cue in cues:
+            writer.add(cue)
+
+def find_audio_files(paths):
+    files = []
+    seen = set()
+    def add(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            files.append(path)
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, names in os.walk(path):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in BATCH_EXTENSIONS:
+                        add(os.path.join(dirpath, name))
+        elif os.path.isfile(path):
+            add(path)
+    return files
+
+def batch_output_base(path, output_dir=None, root=None):
+    # Keep the source extension so lecture.mp3 and lecture.wav don't share lecture.srt,
+    # and mirror the subfolder under output_dir so a/lecture.mp3 and b/lecture.mp3 don't either.
+    path = os.path.abspath(path)
+    if not output_dir:
+        return path
+    rel = os.path.relpath(path, root) if root else os.path.basename(path)
+    return os.path.join(output_dir, rel)
+
+def split_on_silence(audio, sr=SAMPLE_RATE, max_seconds=BATCH_MAX_SEGMENT_SECONDS, min_seconds=BATCH_MIN_SEGMENT_SECONDS, min_silence=BATCH_MIN_SILENCE_SECONDS, silence_db=BATCH_SILENCE_DB):
+    frame = int(BATCH_FRAME_SECONDS * sr)
+    n = audio.shape[0] // frame
+    if n == 0:
+        return [(0, audio.shape[0])] if audio.shape[0] else []
+    frames = audio[:n * frame].reshape(n, frame)
+    db = 10.0 * np.log10(np.maximum(np.mean(frames * frames, axis=1), 1e-20))
+    silent = db < silence_db
+    
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    min_run = max(1, int(min_silence / BATCH_FRAME_SECONDS))
+    keep = (run_ends - run_starts) >= min_run
+    cuts = (run_starts[keep] + run_ends[keep]) // 2
+    
+    max_frames = int(max_seconds / BATCH_FRAME_SECONDS)
+    min_frames = int(min_seconds / BATCH_FRAME_SECONDS)
+    segments = []
+    start = 0
+    while start < n:
+        limit = start + max_frames
+        if limit >= n:
+            end = n
+        else:
+            window = cuts[(cuts > start + min_frames) & (cuts <= limit)]
+            if window.size:
+                end = int(window[-1])
+            else:
+                end = start + min_frames + int(np.argmin(db[start + min_frames:limit]))
+        if not silent[start:end].all():
+            segments.append((start * frame, audio.shape[0] if end == n else end * frame))
+        start = end
+    return segments
+
+_batch_model = None
+_batch_device = None
+
+def _batch_worker_init(model_name, device, threads):
+    global _batch_model, _batch_device
+    ensure_decoder()
+    try:
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    _batch_device = device
+    _batch_model = whisper.load_model(model_name, device=device)
+
+def _batch_decode_segment(key, audio, offset):
+    result = _batch_model.transcribe(
+        audio,
+        language="en",
+        task="transcribe",
+        fp16=(_batch_device == "cuda"),
+        condition_on_previous_text=False,
+        beam_size=1,
+        best_of=1,
+        temperature=0.0,
+        compression_ratio_threshold=2.4,
+        logprob_threshold=-1.0,
+        no_speech_threshold=0.6
+    )
+    cues = []
+    for seg in result.get("segments", []):
+        text = seg["text"].strip()
+        if text:
+            cues.append({"start": round(offset + seg["start"], 3), "end": round(offset + seg["end"], 3), "text": text})
+    return key, cues
+
+def _load_progress(journal_path, segments):
+    expected = {i: (start, end) for i, (start, end) in enumerate(segments)}
+    done = {}
+    stale = False
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    if expected.get(rec["segment"]) == (rec["start_sample"], rec["end_sample"]):
+                        done[rec["segment"]] = rec
+                    else:
+                        stale = True
+                except Exception:
+                    stale = True
+    except FileNotFoundError:
+        pass
+    if stale:
+        with open(journal_path, "w", encoding="utf-8") as f:
+            for rec in done.values():
+                f.write(json.dumps(rec) + "\n")
+    return done
+
+def transcribe_batch(paths, output_dir=None, formats=BATCH_FORMATS, workers=None, model_name=MODEL_NAME, device=None):
+    files = find_audio_files(paths)
+    if not files:
+        print("no audio files found")
+        return
+    ensure_decoder()
+    device = device or ("cuda" if cuda_available() else "cpu")
+    cpus = os.cpu_count() or 1
+    workers = workers or (1 if device == "cuda" else max(1, cpus // 2))
+    threads = max(1, cpus // workers)
+    
+    jobs = {}
+    try:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    except ValueError:
+        root = None
+    
+    def tasks():
+        for path in files:
+            base_path = batch_output_base(path, output_dir, root)
+            os.makedirs(os.path.dirname(base_path), exist_ok=True)
+            try:
+                audio = whisper.load_audio(path)
+            except Exception as e:
+                print(f"{path}: could not load audio ({e})")
+                continue
+            segments = split_on_silence(audio)
+            journal_path = base_path + ".progress.jsonl"
+            done = _load_progress(journal_path, segments)
+            job = {"path": path, "base_path": base_path, "journal": journal_path, "done": done, "pending": 0, "failed": 0, "queued": True}
+            jobs[path] = job
+            print(f"{path}: {len(segments)} segments, {len(done)} already done")
+            for i, (start, end) in enumerate(segments):
+                if i in done:
+                    continue
+                job["pending"] += 1
+                yield (path, i, start, end), audio[start:end], start / SAMPLE_RATE
+            job["queued"] = False
+            if job["pending"] == 0:
+                _finish_batch_job(job, formats)
+    
+    def finish_segment(key, cues=None, error=None):
+        path, i, start, end = key
+        job = jobs[path]
+        if error is None:
+            rec = {"segment": i, "start_sample": start, "end_sample": end, "cues": cues}
+            with open(job["journal"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+            job["done"][i] = rec
+        else:
+            print(f"{path}: segment {i} ({start / SAMPLE_RATE:.1f}s) failed: {error!r}")
+            job["failed"] += 1
+        job["pending"] -= 1
+        if job["pending"] == 0 and not job["queued"]:
+            _finish_batch_job(job, formats)
+    
+    start_time = time.perf_counter()
+    audio_seconds = 0.0
+    broken = None
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init, initargs=(model_name, device, threads)) as pool:
+        pending = {}
+        source = tasks()
+        exhausted = False
+        while pending or not (exhausted or broken):
+            while not (exhausted or broken) and len(pending) < workers * 2:
+                try:
+                    key, audio, offset = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                try:
+                    pending[pool.submit(_batch_decode_segment, key, audio, offset)] = key
+                except concurrent.futures.BrokenExecutor as e:
+                    broken = e
+                    finish_segment(key, error=e)
+                    break
+                audio_seconds += audio.shape[0] / SAMPLE_RATE
+            if not pending:
+                continue
+            finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                key = pending.pop(future)
+                try:
+                    _, cues = future.result()
+                except concurrent.futures.BrokenExecutor as e:
+                    broken = e
+                    finish_segment(key, error=e)
+                except Exception as e:
+                    finish_segment(key, error=e)
+                else:
+                    finish_segment(key, cues)
+    
+    elapsed = time.perf_counter() - start_time
+    if broken is not None:
+        print(f"stopped: the worker pool broke ({broken}); run the same command again to resume")
+    if audio_seconds:
+        print(f"decoded {audio_seconds:.0f}s of audio in {elapsed:.0f}s ({audio_seconds / elapsed:.1f}x real time, {workers} workers)")
+
+def _finish_batch_job(job, formats):
+    cues = [cue for i in sorted(job["done"]) for cue in job["done"][i]["cues"]]
+    write_subtitles(job["base_path"], cues, formats)
+    if job["failed"]:
+        print(f"{job['path']}: wrote {len(cues)} captions, {job['failed']} segments failed (run again to retry them)")
+    else:
+        print(f"{job['path']}: wrote {len(cues)} captions")
+
+def run_broadcast_benchmark(clients=40, events=2000):
+    # A small send buffer keeps loopback from absorbing the stalled client's backlog.
+    server, broadcaster = start_caption_server("127.0.0.1", 0, send_buffer=BROADCAST_BENCH_SNDBUF)
+    port = server.server_address[1]
+    request = f"GET /events HTTP/1.0\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode()
+    received = [0] * clients
+    readers = []
+
+    def read_events(i, sock):
+        data = b""
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+                parts = data.split(b"\n\n")
+                data = parts[-1]
+                received[i] += sum(1 for part in parts[:-1] if b"data: " in part)
+        except Exception:
+            pass
+
+    for i in range(clients):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(request)
+        t = threading.Thread(target=read_events, args=(i, sock), daemon=True)
+        t.start()
+        readers.append((t, sock))
+    stalled = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled.connect(("127.0.0.1", port))
+    stalled.sendall(request)
+    
+    deadline = time.monotonic() + 5.0
+    while broadcaster.client_count() < clients + 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    text = "the quick brown fox jumps over the lazy dog " * 12
+    burst = BROADCAST_CLIENT_QUEUE // 2
+    start = time.perf_counter()
+    publish_time = 0.0
+    for i in range(0, events, burst):
+        t0 = time.perf_counter()
+        for j in range(i, min(events, i + burst)):
+            broadcaster.publish("committed" if j % 2 else "tentative", "OUTPUT", text)
+        publish_time += time.perf_counter() - t0
+        deadline = time.monotonic() + 2.0
+        while min(received) < min(events, i + burst) and time.monotonic() < deadline:
+            time.sleep(0.0005)
+    elapsed = time.perf_counter() - start
+    
+    deadline = time.monotonic() + 10.0
+    overflow = 0
+    while broadcaster.dropped_clients == 0 and time.monotonic() < deadline:
+        for _ in range(burst):
+            broadcaster.publish("tentative", "OUTPUT", text)
+        overflow += burst
+        wait = time.monotonic() + 2.0
+        while min(received) < events + overflow and time.monotonic() < wait:
+            time.sleep(0.0005)
+    
+    stop_caption_server(server)
+    stalled.close()
+    for _, sock in readers:
+        sock.close()
+    print(f"clients={clients} events={events} payload={len(text)} chars")
+    print(f"publish       {events / publish_time:10.0f} events/s")
+    print(f"delivery      {sum(received) / elapsed:10.0f} events/s across clients")
+    print(f"received      min {min(received)} / max {max(received)} per client")
+    print(f"dropped       {broadcaster.dropped_clients} slow clients after {overflow} extra events")
+    ok = broadcaster.dropped_clients >= 1 and min(received) >= events
+    print(f"{'PASS' if ok else 'FAIL'}: stalled client dropped, all live clients kept up")
+    return ok
+
+def run_meter_benchmark(sessions=24, frames=5000, seed=0):
+    meter = FakeSessionMeter(sessions=sessions, seed=seed)
+    table = SessionTable()
+    snapshot_time = 0.0
+    diff_time = 0.0
+    touched = 0
+    total_rows = 0
+    # Replaying the diffs onto a mirror must reproduce a table rebuilt from scratch.
+    mirror = {}
+    errors = 0
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        snap = meter.snapshot()
+        t1 = time.perf_counter()
+        added, changed, removed, playing = table.update(snap)
+        t2 = time.perf_counter()
+        snapshot_time += t1 - t0
+        diff_time += t2 - t1
+        touched += len(added) + len(changed) + len(removed)
+        total_rows += len(table.rows)
+        
+        peaks = {}
+        for _, pname, peak in snap:
+            name = normalize_process_name(pname)
+            peaks[name] = max(peak, peaks.get(name, -1.0))
+        expected = {name: format_level(peak) for name, peak in peaks.items()}
+        ok = (all(name not in mirror for name, _ in added)
+              and all(name in mirror and mirror[name] != level for name, level in changed)
+              and all(name in mirror for name in removed))
+        for name in removed:
+            mirror.pop(name, None)
+        mirror.update(added)
+        mirror.update(changed)
+        if not ok or mirror != expected or playing != sum(1 for peak in peaks.values() if peak >= TRANSCRIBE_THRESHOLD):
+            errors += 1
+    print(f"sessions={sessions} frames={frames}")
+    print(f"snapshot      {snapshot_time / frames * 1e6:8.1f} us/frame")
+    print(f"diff          {diff_time / frames * 1e6:8.1f} us/frame")
+    print(f"rows touched  {touched / frames:8.1f} of {total_rows / frames:.1f} per frame")
+    print(f"{'PASS' if errors == 0 else 'FAIL'}: {errors} frames where the diff did not match a full rebuild")
+    return errors == 0
+
+def calibration_audio(seconds, sr=SAMPLE_RATE, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    pitch = 140.0 + 30.0 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t)
+    audio = 0.2 * voiced * syllables + 0.01 * rng.standard_normal(t.shape[0])
+    return audio.astype(np.float32)
+
+def cached_whisper_models(names):
+    root = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "whisper")
+    urls = getattr(whisper, "_MODELS", {})
+    return [name for name in names if name in urls and os.path.isfile(os.path.join(root, os.path.basename(urls[name])))]
+
+def calibrate_transcription(device=None, models=None, chunks=CALIBRATE_CHUNKS, target_rtf=CALIBRATE_TARGET_RTF, runs=CALIBRATE_RUNS, cached_only=False):
+    ensure_decoder()
+    device = device or ("cuda" if cuda_available() else "cpu")
+    models = models or (CALIBRATE_MODELS if device == "cuda" else CALIBRATE_CPU_MODELS)
+    if cached_only:
+        models = cached_whisper_models(models)
+        if not models:
+            return None
+    audio = calibration_audio(CHUNK_SECONDS)
+    options = whisper_options(device)
+    decode_ms = {}
+    for name in models:
+        print(f"calibrating {name} on {device}...", flush=True)
+        model = whisper.load_model(name, device=device)
+        model.transcribe(audio, **options)
+        times = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            model.transcribe(audio, **options)
+            times.append(time.perf_counter() - t0)
+        decode_ms[name] = sorted(times)[len(times) // 2] * 1000.0
+        del model
+        if device == "cuda":
+            torch.cuda.empty_cache()
+        if decode_ms[name] / 1000.0 / max(chunks) > target_rtf:
+            break
+    
+    model_name, chunk_seconds = models[0], CALIBRATE_FALLBACK_CHUNK
+    for name, ms in decode_ms.items():
+        fitting = [c for c in chunks if ms / 1000.0 / c <= target_rtf]
+        if fitting:
+            model_name, chunk_seconds = name, fitting[0]
+    return {
+        "model": model_name,
+        "chunk_seconds": chunk_seconds,
+        "device": device,
+        "decode_ms": decode_ms,
+        "rtf": decode_ms.get(model_name, 0.0) / 1000.0 / chunk_seconds,
+        "calibrated_at": time.time(),
+    }
+
+def run_calibration(settings, cached_only=False):
+    result = calibrate_transcription(cached_only=cached_only)
+    if result is None:
+        print("no whisper models downloaded yet; calibration will run on a later launch")
+        return None
+    settings.calibration = result
+    settings.update(model=result["model"], chunk_seconds=result["chunk_seconds"])
+    path = settings.save()
+    for name, ms in result["decode_ms"].items():
+        print(f"{name:<8} {ms:8.1f} ms per {CHUNK_SECONDS:.1f}s chunk")
+    print(f"picked model={result['model']} chunk={result['chunk_seconds']:.1f}s rtf={result['rtf']:.2f} ({path})")
+    return result
+
+def run_soak(hours=SOAK_HOURS, model_name=MODEL_NAME, chunk_seconds=CHUNK_SECONDS, replay=None, memory_budget=None):
+    ensure_decoder()
+    audio = whisper.load_audio(replay) if replay else calibration_audio(30.0)
+    output = queue.Queue()
+    recorder = ReplayRecorder(audio, chunk_seconds=chunk_seconds)
+    transcriber = WhisperTranscriber(recorder, output, model_name=model_name)
+    transcript = TranscriptBuffer()
+    watchdog = MemoryWatchdog(memory_budget)
+    recorder.start()
+    transcriber.start()
+    
+    interval = min(SOAK_SAMPLE_SECONDS, hours * 3600.0 / SOAK_MIN_SAMPLES)
+    start = time.monotonic()
+    end = start + hours * 3600.0
+    next_sample = start
+    samples = []
+    captions = 0
+    try:
+        while time.monotonic() < end:
+            try:
+                transcript.add(output.get(timeout=0.5)['text'])
+                captions += 1
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_sample:
+                rss = watchdog.check()
+                elapsed = time.monotonic() - start
+                samples.append((elapsed, rss))
+                print(f"{elapsed / 60:8.1f} min  rss {rss / 1048576:8.1f} MB  captions {captions}  transcript {len(transcript.full_text)} chars", flush=True)
+                next_sample += interval
+    finally:
+        recorder.stop()
+        transcriber.stop()
+    ok, growth = soak_verdict(samples)
+    print(f"{'PASS' if ok else 'FAIL'}: steady-state RSS growth {growth:+.1f} MB (limit {SOAK_MAX_GROWTH_MB:.0f} MB)")
+    return ok
+
+def run_timestamp_benchmark(model_name=MODEL_NAME, chunk_seconds=CHUNK_SECONDS, chunks=20, audio_path=None, batch=BATCH_DECODE_MAX):
+    ensure_decoder()
+    audio = whisper.load_audio(audio_path) if audio_path else calibration_audio(chunks * chunk_seconds)
+    size = int(chunk_seconds * SAMPLE_RATE)
+    pieces = [audio[i:i + size] for i in range(0, audio.shape[0] - size + 1, size)][:chunks]
+    transcriber = BatchedTranscriber([ReplayRecorder(audio, chunk_seconds=chunk_seconds)], queue.Queue(), model_name=model_name)
+    transcriber.load_model()
+    print(f"model={model_name} device={transcriber.device} chunks={len(pieces)} x {chunk_seconds:.1f}s")
+    
+    def timed(fn):
+        fn(pieces[0])
+        times = []
+        cues = 0
+        for piece in pieces:
+            t0 = time.perf_counter()
+            cues += fn(piece)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        times.sort()
+        return times[len(times) // 2], cues
+    
+    def transcribe(word_timestamps):
+        def fn(piece):
+            result = transcriber.model.transcribe(piece, **whisper_options(transcriber.device, word_timestamps))
+            return len(place_segments(result.get("segments", []), 0.0))
+        return fn
+    
+    def decode(timestamps, word_timestamps=False):
+        def fn(piece):
+            mels = transcriber._mels([piece] * batch)
+            results = transcriber._decode(mels, timestamps)
+            if not timestamps:
+                return 0
+            transcriber.word_timestamps = word_timestamps
+            return sum(len(transcriber._segments(result, mel, piece.shape[0], 0.0, 0.0)) for mel, result in zip(mels, results))
+        return fn
+    
+    rows = (
+        ("transcribe text", transcribe(False)),
+        ("transcribe words", transcribe(True)),
+        (f"batch x{batch} text", decode(False)),
+        (f"batch x{batch} segments", decode(True)),
+        (f"batch x{batch} words", decode(True, True)),
+    )
+    baseline = None
+    for name, fn in rows:
+        ms, cues = timed(fn)
+        if name.endswith("text"):
+            baseline = ms
+            overhead = ""
+        else:
+            overhead = f"{(ms / baseline - 1.0) * 100.0:+6.1f}%"
+        print(f"{name:<20} {ms:8.1f} ms/chunk {overhead:>8}  cues {cues}")
+
+def run_text_benchmark(chunks=5000, seed=0, filters=()):
+    rng = random.Random(seed)
+    vocab = ("the", "a", "I", "we", "so", "and", "um", "uh", "you", "know", "that", "this", "is", "really", "important", "meeting",
+             "twenty", "one", "hundred", "okay,", "right?", "yes.", "well", "think", "going", "to", "be", "fine", "next", "slide")
+    spoken = []
+    texts = []
+    for _ in range(chunks):
+        fresh = [rng.choice(vocab) for _ in range(rng.randint(3, 8))]
+        if rng.random() < 0.2:
+            fresh.insert(0, fresh[0])
+        texts.append(" ".join(spoken[-2:] + fresh))
+        spoken.extend(fresh)
+    transcript = TranscriptBuffer(keep_chars=10 ** 9, normalizer=TextNormalizer(filters))
+    normalize_token.cache_clear()
+    buckets = collections.defaultdict(list)
+    for text in texts:
+        size = len(transcript.full_text)
+        t0 = time.perf_counter()
+        transcript.add(text)
+        buckets[max(1, size).bit_length()].append(time.perf_counter() - t0)
+    print(f"chunks={chunks} filters={[type(f).__name__ for f in filters]} final={len(transcript.full_text)} chars")
+    for bits in sorted(buckets):
+        times = sorted(buckets[bits])
+        print(f"transcript < {1 << bits:>8} chars  {times[len(times) // 2] * 1e6:7.1f} us/chunk p50  {times[int(len(times) * 0.95)] * 1e6:7.1f} us p95  ({len(times)} chunks)")
+    info = normalize_token.cache_info()
+    print(f"token cache hits {info.hits} misses {info.misses}")
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Live transcription HUD.")
+    parser.add_argument("--allow", nargs="+", default=CAPTION_ALLOW, metavar="PROCESS", help="only caption audio while one of these processes is audible")
+    parser.add_argument("--deny", nargs="+", default=CAPTION_DENY, metavar="PROCESS", help="never treat these processes as a reason to caption (System Sounds is ignored unless named in --allow)")
+    parser.add_argument("--model", default=None, help="whisper model name (default: the calibrated or saved model)")
+    parser.add_argument("--chunk-seconds", type=float, default=None, help="seconds of audio per live decode (default: the calibrated or saved value)")
+    parser.add_argument("--calibrate", action="store_true", help="measure decode speed on this machine and save the model and chunk length to use")
+    parser.add_argument("--no-calibrate", action="store_true", help="skip the one-time calibration on first launch")
+    parser.add_argument("--sources", nargs="+", default=DEFAULT_SOURCES, metavar="SOURCE", help="capture sources: default, mic, mic:NAME or an output device name; several sources get one lane each")
+    parser.add_argument("--list-sources", action="store_true", help="list capture devices and exit")
+    parser.add_argument("--serve", action="store_true", help="publish captions to browsers and overlays over server-sent events")
+    parser.add_argument("--serve-host", default=BROADCAST_HOST, help="address for --serve (default: localhost only)")
+    parser.add_argument("--serve-port", type=int, default=BROADCAST_PORT, help="port for --serve")
+    parser.add_argument("--serve-origin", nargs="+", default=[], metavar="ORIGIN", help="web origins (e.g. https://example.org) allowed to read --serve captions from their own pages")
+    parser.add_argument("--batch", nargs="+", metavar="PATH", help="transcribe audio files or directories offline and exit")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch, each with its own model")
+    parser.add_argument("--formats", nargs="+", choices=BATCH_FORMATS, default=list(BATCH_FORMATS), help="caption formats written by --batch")
+    parser.add_argument("--output-dir", default=None, help="directory for --batch output, mirroring input subfolders (default: next to each input)")
+    parser.add_argument("--subtitles", nargs="?", const=".", default=None, metavar="DIR", help="append timed captions to .srt and .vtt files in DIR as they are committed")
+    parser.add_argument("--word-timestamps", action="store_true", help="align each word in --subtitles output (costs an extra alignment pass per chunk)")
+    parser.add_argument("--drop-fillers", action="store_true", help="leave filler words such as um and uh out of the transcript")
+    parser.add_argument("--mask-words", nargs="+", default=[], metavar="WORD", help="mask these words in the transcript (for example profanity)")
+    parser.add_argument("--format-numbers", action="store_true", help="write spoken numbers as digits")
+    parser.add_argument("--memory-budget", type=float, default=None, metavar="MB", help="shed buffers, batching and finally model size when RSS stays above this budget")
+    parser.add_argument("--soak", type=float, nargs="?", const=SOAK_HOURS, default=None, metavar="HOURS", help=f"replay audio through the live pipeline for HOURS (default {SOAK_HOURS:.0f}) and fail if memory grows")
+    parser.add_argument("--soak-replay", default=None, metavar="FILE", help="audio file to replay for --soak (default: synthetic audio)")
+    parser.add_argument("--bench-meters", action="store_true", help="benchmark session metering against a fake meter and exit")
+    parser.add_argument("--bench-broadcast", action="store_true", help="benchmark the caption server against local clients and exit")
+    parser.add_argument("--bench-clients", type=int, default=40, help="number of local clients for --bench-broadcast")
+    parser.add_argument("--bench-sessions", type=int, default=24, help="number of fake audio sessions for --bench-meters")
+    parser.add_argument("--bench-frames", type=int, default=5000, help="number of iterations for benchmarks")
+    parser.add_argument("--bench-text", action="store_true", help="benchmark transcript normalization per chunk against transcript length and exit")
+    parser.add_argument("--bench-timestamps", action="store_true", help="compare decode time with and without segment and word timestamps and exit")
+    parser.add_argument("--bench-audio", default=None, metavar="FILE", help="audio file for --bench-timestamps (default: synthetic audio)")
+    return parser
+
+def text_filters(args):
+    filters = []
+    if args.drop_fillers:
+        filters.append(FillerFilter())
+    if args.mask_words:
+        filters.append(ProfanityFilter(args.mask_words))
+    if args.format_numbers:
+        filters.append(NumberFilter())
+    return filters
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    settings = SettingsStore("live_captions", CAPTION_SETTINGS, limits=CAPTION_LIMITS).load()
+    if args.calibrate:
+        run_calibration(settings)
+    if args.batch:
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        transcribe_batch(args.batch, output_dir=args.output_dir, formats=args.formats, workers=args.workers, model_name=args.model or settings["model"])
+        return
+    if args.soak is not None:
+        ok = run_soak(args.soak, model_name=args.model or settings["model"], chunk_seconds=args.chunk_seconds or settings["chunk_seconds"], replay=args.soak_replay, memory_budget=args.memory_budget)
+        sys.exit(0 if ok else 1)
+    if args.bench_meters:
+        sys.exit(0 if run_meter_benchmark(sessions=args.bench_sessions, frames=args.bench_frames) else 1)
+    if args.bench_broadcast:
+        sys.exit(0 if run_broadcast_benchmark(clients=args.bench_clients, events=args.bench_frames) else 1)
+    if args.bench_text:
+        run_text_benchmark(chunks=args.bench_frames, filters=text_filters(args))
+        return
+    if args.bench_timestamps:
+        run_timestamp_benchmark(model_name=args.model or settings["model"], chunk_seconds=args.chunk_seconds or settings["chunk_seconds"], audio_path=args.bench_audio)
+        return
+    
     if sys.platform != "win32":
         return
+    if args.list_sources:
+        list_capture_sources()
+        return
+    
+    ensure_decoder()
+    if settings.calibration is None and not args.no_calibrate and not (args.model and args.chunk_seconds):
+        # First launch must never keep the HUD from starting: only time models
+        # that are already downloaded and fall back to saved settings on failure.
+        try:
+            run_calibration(settings, cached_only=True)
+        except Exception as e:
+            print(f"calibration failed ({e!r}); using model={settings['model']} chunk={settings['chunk_seconds']:.1f}s")
+    
+    server = None
+    broadcaster = None
+    if args.serve:
+        server, broadcaster = start_caption_server(args.serve_host, args.serve_port, origins=args.serve_origin)
     
     root = tk.Tk()
-    app = App(root)
+    app = App(root, gate=TranscriptionGate(args.allow, args.deny), model_name=args.model or settings["model"], sources=args.sources, broadcaster=broadcaster, chunk_seconds=args.chunk_seconds or settings["chunk_seconds"], memory_budget=args.memory_budget, subtitles_dir=args.subtitles, word_timestamps=args.word_timestamps, text_filters=text_filters(args))
     try:
         root.mainloop()
     finally:
         app.stop()
+        if server is not None:
+            stop_caption_server(server)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,14 +1,26 @@
 import sys
+import os
 import subprocess
 import importlib
 import platform
 import time
+import json
+import threading
+import collections
+import bisect
+import gc
+import ctypes
+import argparse
+import math
+import random
+import tracemalloc
 
 REQUIRED = [
     ("PySide6", "PySide6"),
     ("numpy", "numpy"),
     ("mss", "mss"),
     ("Pillow", "PIL"),
+    ("psutil", "psutil"),
 ]
 
 def ensure_dependencies():
@@ -23,12 +35,69 @@ def ensure_dependencies():
 
 ensure_dependencies()
 
+import numpy as np
+import psutil
 from mss import mss
-from PIL import Image, ImageOps, ImageEnhance
+from PIL import Image, ImageOps, ImageEnhance, ImageDraw
 from PySide6 import QtCore, QtGui, QtWidgets
 
 _WDA_EXCLUDEFROMCAPTURE = 0x00000011
 
+METRICS_BUCKETS_MS = (0.5, 1, 2, 5, 10, 16, 25, 33, 50, 100, 250, 500, 1000, 2500, 5000)
+PROFILE_SECONDS = 5.0
+PROFILE_INTERVAL_SECONDS = 0.005
+STATS_REFRESH_MS = 500
+DRAW_INTERVAL_MS = 30
+FREEZE_ZOOM_STEP = 0.1
+FREEZE_CACHE_MAX_PIXELS = 48_000_000
+FULL_TILE_SIZE = 40
+FULL_PROBE_STEP = 1
+PREDICT_WINDOW_SECONDS = 0.1
+PREDICT_MAX_LEAD_SECONDS = 0.1
+PREDICT_MARGIN_PX = 16
+QUALITY_TIERS = {"high": Image.LANCZOS, "medium": Image.BILINEAR, "low": Image.NEAREST}
+DRAW_INTERVALS_MS = (16, 30, 50, 80)
+SETTINGS_DIR = os.path.join(os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"), "AccessibilityPlatform")
+MAGNIFIER_SETTINGS = {
+    "mode": "lens",
+    "lens_diameter": 300,
+    "lens_zoom": 2.0,
+    "bar_height": 180,
+    "bar_zoom": 1.8,
+    "quality": "high",
+    "draw_interval_ms": DRAW_INTERVAL_MS,
+}
+MAGNIFIER_LIMITS = {
+    "mode": ("off", "lens", "bar", "full"),
+    "lens_diameter": (100, 600),
+    "lens_zoom": (1.2, 5.0),
+    "bar_height": (100, 600),
+    "bar_zoom": (1.2, 5.0),
+    "quality": tuple(QUALITY_TIERS),
+    "draw_interval_ms": (DRAW_INTERVALS_MS[0], DRAW_INTERVALS_MS[-1]),
+}
+CALIBRATE_FRAMES = 40
+CALIBRATE_HEADROOM = 0.8
+MEMORY_CHECK_SECONDS = 30.0
+MEMORY_TRIM_SECONDS = 300.0
+SOAK_HOURS = 8.0
+SOAK_SAMPLE_SECONDS = 60.0
+SOAK_MIN_SAMPLES = 60
+SOAK_WARMUP_FRACTION = 0.1
+SOAK_MAX_GROWTH_MB = 32.0
+SOAK_MODE_FRAMES = 120
+
+BENCH_RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+BENCH_SOURCES = ("static", "text", "noise")
+BENCH_MODES = ("lens", "bar", "full")
+BENCH_ZOOMS = (1.5, 2.0, 3.0, 4.0)
+BENCH_PATH_SECONDS = 18.0
+BENCH_ALLOC_FRAMES = 20
+
 def _set_window_exclude_from_capture(hwnd, enable=True):
     if platform.system() != "Windows":
         return False
@@ -41,6 +110,261 @@ def _set_window_exclude_from_capture(hwnd, enable=True):
     except Exception:
         return False
 
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def snapshot(self):
+        return self.value
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets=METRICS_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["inf"], self.counts))
+        }
+
+class Metrics:
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, kind):
+        item = self._items.get(name)
+        if item is None:
+            with self._lock:
+                item = self._items.setdefault(name, kind())
+        return item
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._items.items())
+        return {name: item.snapshot() for name, item in items}
+
+    def format_lines(self):
+        lines = []
+        for name, value in self.snapshot().items():
+            if isinstance(value, dict):
+                lines.append(f"{name:<22} p50 {value['p50']:>6.1f}  p95 {value['p95']:>6.1f}  max {value['max']:>7.1f}")
+            elif isinstance(value, float):
+                lines.append(f"{name:<22} {value:>10.2f}")
+            else:
+                lines.append(f"{name:<22} {value:>10}")
+        return lines
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"time": time.time(), "metrics": self.snapshot()}, f, indent=2)
+        return path
+
+metrics = Metrics()
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, path, seconds=PROFILE_SECONDS):
+        if self.is_running():
+            return False
+        self._thread = threading.Thread(target=self._run, args=(path, seconds), daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, path, seconds):
+        own = threading.get_ident()
+        stacks = collections.Counter()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(parts))] += 1
+            time.sleep(self.interval)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def trim_memory():
+    gc.collect()
+    try:
+        if sys.platform.startswith("linux"):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        elif sys.platform == "win32":
+            ctypes.cdll.msvcrt._heapmin()
+    except (OSError, AttributeError):
+        pass
+
+class MemoryWatchdog:
+    def __init__(self, budget_mb=None, steps=(), trim_seconds=MEMORY_TRIM_SECONDS):
+        self.budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.steps = list(steps)
+        self.level = 0
+        self.trim_seconds = trim_seconds
+        self._last_trim = time.monotonic()
+        self._process = psutil.Process()
+        self._rss = metrics.gauge("rss_mb")
+        self._level = metrics.gauge("memory_level")
+        self._trims = metrics.counter("memory_trims")
+
+    def rss(self):
+        return self._process.memory_info().rss
+
+    def check(self):
+        now = time.monotonic()
+        rss = self.rss()
+        over = self.budget is not None and rss > self.budget
+        if over or now - self._last_trim >= self.trim_seconds:
+            trim_memory()
+            self._trims.inc()
+            self._last_trim = now
+            rss = self.rss()
+        if self.budget is not None and rss > self.budget and self.level < len(self.steps):
+            self.steps[self.level]()
+            self.level += 1
+            self._level.set(self.level)
+        self._rss.set(rss / 1048576.0)
+        return rss
+
+def soak_verdict(samples, warmup_fraction=SOAK_WARMUP_FRACTION, max_growth_mb=SOAK_MAX_GROWTH_MB):
+    steady = [rss for _, rss in samples[int(len(samples) * warmup_fraction):]]
+    if len(steady) < 4:
+        return True, 0.0
+    quarter = len(steady) // 4
+    head, tail = steady[:quarter], steady[-quarter:]
+    growth = max(max(tail) - max(head), min(tail) - min(head)) / 1048576.0
+    return growth <= max_growth_mb, growth
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+class SettingsStore:
+    def __init__(self, name, defaults, path=None, limits=None):
+        self.path = path or os.path.join(SETTINGS_DIR, f"{name}.json")
+        self.defaults = dict(defaults)
+        self.limits = dict(limits or {})
+        self.values = dict(defaults)
+        self.calibration = None
+        self.machine = machine_id()
+        self._data = {}
+
+    def _accepts(self, key, value):
+        default = self.defaults.get(key)
+        if key not in self.defaults or isinstance(value, bool) != isinstance(default, bool):
+            return False
+        if isinstance(default, float):
+            ok = isinstance(value, (int, float))
+        else:
+            ok = isinstance(value, type(default))
+        # Limits are allowed choices for strings and an inclusive (low, high) range for numbers.
+        limit = self.limits.get(key)
+        if not ok or limit is None:
+            return ok
+        if isinstance(default, str):
+            return value in limit
+        return limit[0] <= value <= limit[1]
+
+    def load(self):
+        t0 = time.perf_counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._data = data if isinstance(data, dict) else {}
+        entry = self._data.get("machines", {}).get(self.machine) or {}
+        for key, value in (entry.get("values") or {}).items():
+            if self._accepts(key, value):
+                self.values[key] = value
+        self.calibration = entry.get("calibration")
+        metrics.gauge("settings_load_ms").set((time.perf_counter() - t0) * 1000.0)
+        return self
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def update(self, **values):
+        for key, value in values.items():
+            if self._accepts(key, value):
+                self.values[key] = value
+
+    def save(self):
+        machines = self._data.setdefault("machines", {})
+        machines[self.machine] = {"values": self.values, "calibration": self.calibration}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        return self.path
+
 class ScreenSampler:
     def __init__(self):
         self.sct = mss()
@@ -50,8 +374,308 @@ class ScreenSampler:
 
     def grab_full(self):
         shot = self.sct.grab({"left": 0, "top": 0, "width": self.screen_width, "height": self.screen_height})
-        img = Image.frombuffer("RGBA", shot.size, shot.bgra, "raw", "BGRA", 0, 1)
-        return img.convert("RGB")
+        return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX", 0, 1)
+
+    def grab_region(self, left, top, width, height):
+        shot = self.sct.grab({"left": left, "top": top, "width": width, "height": height})
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+class SyntheticSampler:
+    def __init__(self, width, height, kind="static", seed=0):
+        self.screen_width = width
+        self.screen_height = height
+        self.kind = kind
+        self._rng = random.Random(seed)
+        self._tick = 0
+        if kind == "text":
+            frames = [self._text_page(width, height * 3)]
+        elif kind == "noise":
+            frames = [self._noise_frame(width, height, i) for i in range(4)]
+        else:
+            frames = [self._static_image(width, height)]
+        self._frames = [np.ascontiguousarray(np.asarray(img.convert("RGBA"))[..., [2, 1, 0, 3]]) for img in frames]
+
+    def _static_image(self, width, height):
+        img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for _ in range(60):
+            x, y = self._rng.randrange(width), self._rng.randrange(height)
+            w, h = self._rng.randrange(40, 400), self._rng.randrange(20, 300)
+            color = tuple(self._rng.randrange(256) for _ in range(3))
+            draw.rectangle((x, y, x + w, y + h), fill=color)
+        return img
+
+    def _text_page(self, width, height):
+        img = Image.new("RGB", (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        words = "the quick brown fox jumps over the lazy dog accessibility magnifier".split()
+        for y in range(0, height, 18):
+            line = " ".join(self._rng.choice(words) for _ in range(width // 40))
+            draw.text((10, y), line, fill=(0, 0, 0))
+        return img
+
+    def _noise_frame(self, width, height, index):
+        small = Image.effect_noise((max(1, width // 8), max(1, height // 8)), 64 + index * 8)
+        return Image.merge("RGB", (small, small.rotate(90, expand=False), small.transpose(Image.FLIP_LEFT_RIGHT))).resize((width, height), Image.BILINEAR)
+
+    def _current(self):
+        self._tick += 1
+        if self.kind == "text":
+            page = self._frames[0]
+            top = (self._tick * 4) % (page.shape[0] - self.screen_height)
+            return page[top:top + self.screen_height]
+        return self._frames[self._tick % len(self._frames)]
+
+    def grab_full(self):
+        return Image.frombuffer("RGB", (self.screen_width, self.screen_height), self._current(), "raw", "BGRX", 0, 1)
+
+    def grab_region(self, left, top, width, height):
+        return self._current()[top:top + height, left:left + width].copy()
+
+class FrozenSampler:
+    # Serves regions of a frozen BGRX frame through the sampler interface, copied
+    # into one reused buffer so TiledViewport can scale them without allocating.
+    def __init__(self, frame):
+        self.frame = frame
+        self.screen_height, self.screen_width = frame.shape[:2]
+        self._out = np.empty(frame.size, dtype=np.uint8)
+
+    def grab_region(self, left, top, width, height):
+        out = self._out[:height * width * 4].reshape(height, width, 4)
+        np.copyto(out, self.frame[top:top + height, left:left + width])
+        return out
+
+class ImagePyramid:
+    def __init__(self, image, max_pixels=FREEZE_CACHE_MAX_PIXELS):
+        self.base = image
+        self.max_pixels = max_pixels
+        self.levels = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = []
+        self._worker = None
+
+    def key(self, zoom):
+        return round(round(zoom / FREEZE_ZOOM_STEP) * FREEZE_ZOOM_STEP, 2)
+
+    def fits(self, key):
+        return self.base.width * key * self.base.height * key <= self.max_pixels
+
+    def level(self, zoom):
+        key = self.key(zoom)
+        with self._lock:
+            img = self.levels.get(key)
+            if img is not None:
+                self.levels.move_to_end(key)
+        return img
+
+    def set_budget(self, max_pixels):
+        with self._lock:
+            self.max_pixels = max_pixels
+            while self.levels and self._cached_pixels() > self.max_pixels:
+                self.levels.popitem(last=False)
+
+    def _cached_pixels(self):
+        return sum(i.width * i.height for i in self.levels.values())
+
+    def prefetch(self, zoom, neighbours=()):
+        with self._lock:
+            self._queue = [(self.key(zoom), True)] + [(self.key(z), False) for z in neighbours]
+            self._queue = [(key, required) for key, required in self._queue if key >= 1.0 and key not in self.levels and self.fits(key)]
+            if self._queue and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._build_levels, daemon=True)
+                self._worker.start()
+
+    def wait(self):
+        worker = self._worker
+        if worker is not None:
+            worker.join()
+
+    def _build_levels(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    return
+                key, required = self._queue.pop(0)
+                size = (int(self.base.width * key), int(self.base.height * key))
+                if key in self.levels or (not required and self._cached_pixels() + size[0] * size[1] > self.max_pixels):
+                    continue
+            img = self.base.resize(size, Image.LANCZOS)
+            with self._lock:
+                self.levels[key] = img
+                while self._cached_pixels() > self.max_pixels:
+                    self.levels.popitem(last=False)
+
+    def crop(self, zoom, left, top, src_w, src_h, out_w, out_h):
+        img = self.level(zoom)
+        if img is not None:
+            key = self.key(zoom)
+            x, y = int(round(left * key)), int(round(top * key))
+            return img.crop((x, y, x + out_w, y + out_h))
+        return self.base.crop((left, top, left + src_w, top + src_h)).resize((out_w, out_h), Image.LANCZOS)
+
+class TiledViewport:
+    def __init__(self, sampler, tile=FULL_TILE_SIZE, probe_step=FULL_PROBE_STEP, smooth=True):
+        # Per-tile checksums reduce over tile // probe_step probe rows and columns,
+        # so a stride that does not divide the tile would mix neighbouring tiles.
+        if probe_step < 1 or tile % probe_step:
+            raise ValueError(f"probe_step {probe_step} must divide the tile size {tile}")
+        self.sampler = sampler
+        self.tile = tile
+        self.probe_step = probe_step
+        self.smooth = smooth
+        self.canvas = None
+        self.image = None
+        self._buffers = []
+        self.double_buffer = True
+        self.zoom = None
+        self.origin = None
+        self.checksums = {}
+        n = tile // probe_step
+        self._tile_weights = np.random.default_rng(0).integers(1, 1 << 31, size=(n, n), dtype=np.uint32) | 1
+        self._weight_cache = None
+        self._probe = None
+        self._dirty = metrics.gauge("tiles_dirty")
+        self._visible = metrics.gauge("tiles_visible")
+
+    def viewport(self, cx, cy, zoom):
+        width, height = self.sampler.screen_width, self.sampler.screen_height
+        src_w, src_h = width / zoom, height / zoom
+        left = min(max(cx - cx / zoom, 0.0), width - src_w)
+        top = min(max(cy - cy / zoom, 0.0), height - src_h)
+        return left, top, src_w, src_h
+
+    def clear(self):
+        self.checksums.clear()
+        self.origin = None
+
+    def _checksums(self, region):
+        t = self.tile // self.probe_step
+        pixels = region[::self.probe_step, ::self.probe_step].view(np.uint32)[..., 0]
+        rows, cols = pixels.shape
+        if self._weight_cache is None or self._weight_cache.shape[0] < rows or self._weight_cache.shape[1] < cols:
+            grid = (-(-self.sampler.screen_height // self.tile), -(-self.sampler.screen_width // self.tile))
+            self._weight_cache = np.tile(self._tile_weights, grid)
+            self._probe = np.empty(self._weight_cache.size, dtype=np.uint32)
+        probe = self._probe[:rows * cols].reshape(rows, cols)
+        np.multiply(pixels, self._weight_cache[:rows, :cols], out=probe)
+        sums = np.add.reduceat(probe, np.arange(0, rows, t), axis=0, dtype=np.uint32)
+        return np.add.reduceat(sums, np.arange(0, cols, t), axis=1, dtype=np.uint32)
+
+    def release_back_buffer(self):
+        self.double_buffer = False
+        del self._buffers[1:]
+
+    def _scroll(self, dx, dy):
+        h, w = self.canvas.shape[:2]
+        if abs(dx) >= w or abs(dy) >= h or len(self._buffers) < 2:
+            return False
+        if dx or dy:
+            back = self._buffers[1]
+            back[0][max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)] = \
+                self.canvas[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)]
+            self._buffers.reverse()
+            self.canvas, self.image = back
+        return True
+
+    def update(self, cx, cy, zoom):
+        t = self.tile
+        width, height = self.sampler.screen_width, self.sampler.screen_height
+        if self.canvas is None:
+            for _ in range(2 if self.double_buffer else 1):
+                canvas = np.zeros((height, width, 4), dtype=np.uint8)
+                self._buffers.append((canvas, QtGui.QImage(canvas.data, width, height, width * 4, QtGui.QImage.Format_RGB32)))
+            self.canvas, self.image = self._buffers[0]
+        
+        left, top, src_w, src_h = self.viewport(cx, cy, zoom)
+        tx0, ty0 = int(left // t), int(top // t)
+        tx1 = min(math.ceil((left + src_w) / t), math.ceil(width / t))
+        ty1 = min(math.ceil((top + src_h) / t), math.ceil(height / t))
+        rx0, ry0 = tx0 * t, ty0 * t
+        rx1, ry1 = min(width, tx1 * t), min(height, ty1 * t)
+        region = self.sampler.grab_region(rx0, ry0, rx1 - rx0, ry1 - ry0)
+        
+        sums = self._checksums(region)
+        
+        ox, oy = math.floor(left * zoom), math.floor(top * zoom)
+        exposed_x = exposed_y = (0, 0)
+        if zoom != self.zoom or self.origin is None or not self._scroll(self.origin[0] - ox, self.origin[1] - oy):
+            self.checksums = {}
+            self.zoom = zoom
+        else:
+            dx, dy = self.origin[0] - ox, self.origin[1] - oy
+            if dx:
+                exposed_x = (0, dx) if dx > 0 else (width + dx, width)
+            if dy:
+                exposed_y = (0, dy) if dy > 0 else (height + dy, height)
+        self.origin = (ox, oy)
+        
+        source = QtGui.QImage(region.data, region.shape[1], region.shape[0], region.strides[0], QtGui.QImage.Format_RGB32)
+        painter = QtGui.QPainter(self.image)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, self.smooth)
+        checksums = {}
+        dirty = 0
+        for j, ty in enumerate(range(ty0, ty1)):
+            y0 = round(ty * t * zoom) - oy
+            y1 = round(min(height, (ty + 1) * t) * zoom) - oy
+            row_exposed = y0 < exposed_y[1] and y1 > exposed_y[0] and exposed_y[0] < exposed_y[1]
+            run = None
+            for i, tx in enumerate(range(tx0, tx1)):
+                checksum = int(sums[j, i])
+                checksums[(tx, ty)] = checksum
+                x0 = round(tx * t * zoom) - ox
+                x1 = round(min(width, (tx + 1) * t) * zoom) - ox
+                if (row_exposed or (x0 < exposed_x[1] and x1 > exposed_x[0] and exposed_x[0] < exposed_x[1])
+                        or self.checksums.get((tx, ty)) != checksum):
+                    dirty += 1
+                    run = (run[0] if run else x0, x1)
+                elif run:
+                    self._draw_run(painter, source, run, (y0, y1), ox - rx0 * zoom, oy - ry0 * zoom, zoom)
+                    run = None
+            if run:
+                self._draw_run(painter, source, run, (y0, y1), ox - rx0 * zoom, oy - ry0 * zoom, zoom)
+        painter.end()
+        
+        self.checksums = checksums
+        self._dirty.set(dirty)
+        self._visible.set(len(checksums))
+
+    def _draw_run(self, painter, source, xs, ys, offset_x, offset_y, zoom):
+        target = QtCore.QRectF(xs[0], ys[0], xs[1] - xs[0], ys[1] - ys[0])
+        src = QtCore.QRectF((xs[0] + offset_x) / zoom, (ys[0] + offset_y) / zoom, (xs[1] - xs[0]) / zoom, (ys[1] - ys[0]) / zoom)
+        painter.drawImage(target, source, src)
+
+class CursorPredictor:
+    def __init__(self, window=PREDICT_WINDOW_SECONDS, max_lead=PREDICT_MAX_LEAD_SECONDS):
+        self.window = window
+        self.max_lead = max_lead
+        self.samples = collections.deque(maxlen=16)
+
+    def record(self, t, x, y):
+        if self.samples and t <= self.samples[-1][0]:
+            self.samples.pop()
+        self.samples.append((t, x, y))
+        while t - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def velocity(self):
+        n = len(self.samples)
+        if n < 2:
+            return 0.0, 0.0
+        mt = sum(s[0] for s in self.samples) / n
+        mx = sum(s[1] for s in self.samples) / n
+        my = sum(s[2] for s in self.samples) / n
+        var = sum((s[0] - mt) ** 2 for s in self.samples)
+        if var <= 0:
+            return 0.0, 0.0
+        vx = sum((s[0] - mt) * (s[1] - mx) for s in self.samples) / var
+        vy = sum((s[0] - mt) * (s[2] - my) for s in self.samples) / var
+        return vx, vy
+
+    def predict(self, t):
+        t0, x0, y0 = self.samples[-1]
+        vx, vy = self.velocity()
+        lead = min(max(0.0, t - t0), self.max_lead)
+        return x0 + vx * lead, y0 + vy * lead
 
 class DraggableMenu(QtWidgets.QWidget):
     def __init__(self, parent_overlay):
@@ -76,23 +700,53 @@ class DraggableMenu(QtWidgets.QWidget):
         event.accept()
 
 class OverlayWindow(QtWidgets.QWidget):
-    def __init__(self, sampler, background_snapshot=None):
+    def __init__(self, sampler, background_snapshot=None, cursor_source=None, predict=True, settings=None, memory_budget=None, offscreen=False):
         super().__init__()
+        self.offscreen = offscreen
         self.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.FramelessWindowHint | QtCore.Qt.Tool)
         self.setAttribute(QtCore.Qt.WA_TranslucentBackground, True)
         self.setMouseTracking(True)
 
         self.sampler = sampler
-        self.mode = 'lens'
+        self.cursor_source = cursor_source or QtGui.QCursor.pos
+        self.settings = settings
+        values = settings.values if settings is not None else MAGNIFIER_SETTINGS
+        self.mode = values["mode"]
         
-        self.lens_diameter = 300
-        self.lens_zoom = 2.0
-        self.bar_height = 180
-        self.bar_zoom = 1.8
+        self.lens_diameter = values["lens_diameter"]
+        self.lens_zoom = values["lens_zoom"]
+        self.bar_height = values["bar_height"]
+        self.bar_zoom = values["bar_zoom"]
+        self.quality = values["quality"] if values["quality"] in QUALITY_TIERS else "high"
+        self.draw_interval = values["draw_interval_ms"]
         
-        self.mouse_pos = QtGui.QCursor.pos()
-        self.base_frame = None
+        self.mouse_pos = self.cursor_source()
+        self.base_frame = background_snapshot
+        self.base_origin = (0, 0)
+        self.frozen = None
+        self.frozen_view = None
+        self.freeze_budget = FREEZE_CACHE_MAX_PIXELS
+        self.viewport = TiledViewport(sampler, smooth=self.quality != "low")
         self.over_menu = False
+        self._input_passthrough = None
+        
+        self.predict = predict
+        self.predictor = CursorPredictor()
+        self.target_pos = (self.mouse_pos.x(), self.mouse_pos.y())
+        self.drawn_pos = None
+        self.last_lag = 0.0
+        self._lead = self.draw_interval / 1000.0
+        self._paint_lead = 0.0
+        self._tick_time = None
+        
+        self.profiler = SamplingProfiler()
+        self._capture_ms = metrics.histogram("capture_ms")
+        self._paint_ms = metrics.histogram("paint_ms")
+        self._frame_ms = metrics.histogram("frame_interval_ms")
+        self._fps = metrics.gauge("fps")
+        self._lag_px = metrics.histogram("cursor_lag_px")
+        self._prefetch_misses = metrics.counter("prefetch_misses")
+        self._last_tick = None
         
         self.menu = self.build_menu()
         
@@ -105,11 +759,26 @@ class OverlayWindow(QtWidgets.QWidget):
         
         self.draw_timer = QtCore.QTimer(self)
         self.draw_timer.timeout.connect(self.on_draw_tick)
-        self.draw_timer.start(30)
+        self.draw_timer.start(self.draw_interval)
+        if settings is not None:
+            QtWidgets.QApplication.instance().aboutToQuit.connect(self.save_settings)
+        
+        self.watchdog = MemoryWatchdog(memory_budget, steps=(self._shed_freeze_cache, self._shed_scroll_buffer, self._shed_quality))
+        self.memory_timer = QtCore.QTimer(self)
+        self.memory_timer.timeout.connect(self.watchdog.check)
+        self.memory_timer.start(int(MEMORY_CHECK_SECONDS * 1000))
         
         self.resize(self.sampler.screen_width, self.sampler.screen_height)
         self.move(0, 0)
 
+    def dispose(self):
+        self.draw_timer.stop()
+        self.memory_timer.stop()
+        self.menu.close()
+        self.close()
+        self.menu.deleteLater()
+        self.deleteLater()
+
     def build_menu(self):
         win = DraggableMenu(self)
         win.setWindowTitle("MAGNIFIER")
@@ -180,9 +849,10 @@ class OverlayWindow(QtWidgets.QWidget):
         mode_box = QtWidgets.QHBoxLayout()
         self.btn_lens = QtWidgets.QPushButton("LENS")
         self.btn_bar = QtWidgets.QPushButton("BAR")
+        self.btn_full = QtWidgets.QPushButton("FULL")
         self.btn_off = QtWidgets.QPushButton("TURN OFF")
         
-        self.buttons = {'lens': self.btn_lens, 'bar': self.btn_bar, 'off': self.btn_off}
+        self.buttons = {'lens': self.btn_lens, 'bar': self.btn_bar, 'full': self.btn_full, 'off': self.btn_off}
 
         for key, btn in self.buttons.items():
             btn.setProperty("class", "modeBtn")
@@ -190,6 +860,11 @@ class OverlayWindow(QtWidgets.QWidget):
             mode_box.addWidget(btn)
 
         layout.addLayout(mode_box)
+
+        self.btn_freeze = QtWidgets.QPushButton("FREEZE FRAME")
+        self.btn_freeze.setProperty("class", "modeBtn")
+        self.btn_freeze.clicked.connect(self.toggle_freeze)
+        layout.addWidget(self.btn_freeze)
         self.update_button_highlight()
 
         def add_slider(parent_layout, label_text, min_v, max_v, curr, callback, is_float=False):
@@ -215,13 +890,55 @@ class OverlayWindow(QtWidgets.QWidget):
         add_slider(config_l, "APERTURE SIZE", 100, 600, self.lens_diameter, lambda v: self.set_param('size', v))
         layout.addWidget(config_grp)
 
+        stats_btn = QtWidgets.QPushButton("STATS")
+        stats_btn.setProperty("class", "modeBtn")
+        stats_btn.clicked.connect(self.toggle_stats)
+        layout.addWidget(stats_btn)
+
+        self.stats_label = QtWidgets.QLabel("")
+        self.stats_label.setStyleSheet("font-family: Consolas, monospace; font-size: 9px; color: #888; letter-spacing: 0px;")
+        self.stats_label.setVisible(False)
+        layout.addWidget(self.stats_label)
+
+        self.stats_timer = QtCore.QTimer(win)
+        self.stats_timer.timeout.connect(self.refresh_stats)
+
+        for key, handler in (("F8", self.toggle_stats), ("F9", self.dump_profile), ("F10", self.export_metrics)):
+            shortcut = QtGui.QShortcut(QtGui.QKeySequence(key), win)
+            shortcut.setContext(QtCore.Qt.ApplicationShortcut)
+            shortcut.activated.connect(handler)
+
         win.resize(360, 480)
         return win
 
+    def toggle_stats(self):
+        visible = not self.stats_label.isVisible()
+        self.stats_label.setVisible(visible)
+        if visible:
+            self.refresh_stats()
+            self.stats_timer.start(STATS_REFRESH_MS)
+        else:
+            self.stats_timer.stop()
+        self.menu.adjustSize()
+
+    def refresh_stats(self):
+        lines = metrics.format_lines() + ["", "F8 HIDE | F9 PROFILE | F10 EXPORT"]
+        self.stats_label.setText("\n".join(lines))
+
+    def dump_profile(self):
+        self.profiler.start(os.path.abspath(time.strftime("magnifier_profile_%Y%m%d_%H%M%S.txt")))
+
+    def export_metrics(self):
+        try:
+            metrics.export(os.path.abspath(time.strftime("magnifier_metrics_%Y%m%d_%H%M%S.json")))
+        except Exception:
+            pass
+
     def set_param(self, name, val):
         if name == 'zoom':
             self.lens_zoom = val
             self.bar_zoom = val
+            self._prefetch_frozen()
         else:
             self.lens_diameter = val
             self.bar_height = val
@@ -229,48 +946,189 @@ class OverlayWindow(QtWidgets.QWidget):
 
     def set_mode(self, mode):
         self.mode = mode
+        if mode != 'full':
+            self.viewport.clear()
+        self._prefetch_frozen()
         self.update_button_highlight()
         self.update()
 
+    def set_quality(self, quality):
+        self.quality = quality
+        for view in (self.viewport, self.frozen_view):
+            if view is not None:
+                view.smooth = quality != "low"
+                view.clear()
+        self.update()
+
+    def _shed_freeze_cache(self):
+        self.freeze_budget = FREEZE_CACHE_MAX_PIXELS // 4
+        if self.frozen is not None:
+            self.frozen.set_budget(self.freeze_budget)
+
+    def _shed_scroll_buffer(self):
+        self.viewport.release_back_buffer()
+        if self.frozen_view is not None:
+            self.frozen_view.release_back_buffer()
+
+    def _shed_quality(self):
+        self.set_quality("low")
+        self.draw_interval = DRAW_INTERVALS_MS[-1]
+        self.draw_timer.setInterval(self.draw_interval)
+
+    def save_settings(self):
+        values = {
+            "lens_diameter": self.lens_diameter,
+            "lens_zoom": self.lens_zoom,
+            "bar_height": self.bar_height,
+            "bar_zoom": self.bar_zoom,
+        }
+        if self.mode != 'off':
+            values["mode"] = self.mode
+        self.settings.update(**values)
+        try:
+            self.settings.save()
+        except OSError:
+            pass
+
+    def toggle_freeze(self):
+        if self.frozen is None:
+            width, height = self.sampler.screen_width, self.sampler.screen_height
+            frame = self.sampler.grab_region(0, 0, width, height)
+            self.base_frame = Image.frombuffer("RGB", (width, height), frame, "raw", "BGRX", 0, 1)
+            self.base_origin = (0, 0)
+            self.frozen = ImagePyramid(self.base_frame, self.freeze_budget)
+            # Full mode scales the frozen frame per tile like the live view does;
+            # whole-screen pyramid levels would not fit the budget at high zoom.
+            self.frozen_view = TiledViewport(FrozenSampler(frame), smooth=self.viewport.smooth)
+            if not self.viewport.double_buffer:
+                self.frozen_view.release_back_buffer()
+            self._prefetch_frozen()
+        else:
+            self.frozen = None
+            self.frozen_view = None
+        self.update_button_highlight()
+        self.update()
+
+    def _prefetch_frozen(self):
+        if self.frozen is not None and self.mode in ('lens', 'bar'):
+            self.frozen.prefetch(self.lens_zoom, (self.lens_zoom - FREEZE_ZOOM_STEP, self.lens_zoom + FREEZE_ZOOM_STEP))
+
     def update_button_highlight(self):
-        for key, btn in self.buttons.items():
-            if self.mode == key:
+        buttons = dict(self.buttons)
+        buttons['freeze'] = self.btn_freeze
+        for key, btn in buttons.items():
+            if self.mode == key or (key == 'freeze' and self.frozen is not None):
                 btn.setStyleSheet("border-color: #FFFFFF; color: #FFFFFF; background-color: #111;")
             else:
                 btn.setStyleSheet("border-color: #222222; color: #888888; background-color: #0A0A0A;")
 
     def on_draw_tick(self):
-        self.mouse_pos = QtGui.QCursor.pos()
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            interval = (now - self._last_tick) * 1000.0
+            self._frame_ms.observe(interval)
+            if interval > 0:
+                self._fps.set(0.9 * self._fps.value + 0.1 * (1000.0 / interval))
+        self._last_tick = now
+        
+        self.mouse_pos = self.cursor_source()
+        self.predictor.record(now, self.mouse_pos.x(), self.mouse_pos.y())
         if self.menu.isVisible():
             mgeo = self.menu.geometry()
             self.over_menu = mgeo.contains(self.mouse_pos)
         
-        if self.over_menu or self.mode == 'off':
-            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, False)
-            self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowTransparentForInput)
-        else:
-            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, True)
-            self.setWindowFlags(self.windowFlags() | QtCore.Qt.WindowTransparentForInput)
+        passthrough = not (self.over_menu or self.mode == 'off')
+        if passthrough != self._input_passthrough:
+            self._input_passthrough = passthrough
+            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, passthrough)
+            if passthrough:
+                self.setWindowFlags(self.windowFlags() | QtCore.Qt.WindowTransparentForInput)
+            else:
+                self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowTransparentForInput)
         
-        if not self.over_menu and self.mode != 'off':
-            self.base_frame = self.sampler.grab_full()
+        self._tick_time = now
+        self.target_pos = (self.mouse_pos.x(), self.mouse_pos.y())
+        if self.predict:
+            self.target_pos = self.predictor.predict(now + self._lead)
+        if not self.over_menu and self.mode == 'full' and self.frozen_view is not None:
+            self.frozen_view.update(round(self.target_pos[0]), round(self.target_pos[1]), self.lens_zoom)
+        elif not self.over_menu and self.mode != 'off' and self.frozen is None:
+            t0 = time.perf_counter()
+            if self.mode == 'full':
+                self.viewport.update(round(self.target_pos[0]), round(self.target_pos[1]), self.lens_zoom)
+            else:
+                self.prefetch(((self.mouse_pos.x(), self.mouse_pos.y()), self.target_pos))
+            self._capture_ms.observe((time.perf_counter() - t0) * 1000.0)
             
-        self.show()
+        if not self.offscreen:
+            self.show()
         self.update()
 
+    def source_rect(self, x, y):
+        if self.mode == 'lens':
+            src_s = int(self.lens_diameter / self.lens_zoom)
+            return x - src_s // 2, y - src_s // 2, src_s, src_s
+        h_bar = self.bar_height
+        return x - (x / self.bar_zoom), y - (h_bar / 2 / self.bar_zoom), int(self.sampler.screen_width / self.bar_zoom), int(h_bar / self.bar_zoom)
+
+    def prefetch(self, points):
+        rects = [self.source_rect(x, y) for x, y in points]
+        m = PREDICT_MARGIN_PX
+        left = max(0, int(min(r[0] for r in rects)) - m)
+        top = max(0, int(min(r[1] for r in rects)) - m)
+        right = min(self.sampler.screen_width, math.ceil(max(r[0] + r[2] for r in rects)) + m)
+        bottom = min(self.sampler.screen_height, math.ceil(max(r[1] + r[3] for r in rects)) + m)
+        if right <= left or bottom <= top:
+            return
+        region = self.sampler.grab_region(left, top, right - left, bottom - top)
+        self.base_frame = Image.frombuffer("RGB", (right - left, bottom - top), region, "raw", "BGRX", 0, 1)
+        self.base_origin = (left, top)
+
+    def fit_prefetch(self, left, top, src_w, src_h):
+        if self.frozen is not None:
+            return left, top
+        ox, oy = self.base_origin
+        fw, fh = self.base_frame.size
+        fitted_left, fitted_top = left, top
+        if ox > 0:
+            fitted_left = max(fitted_left, ox)
+        if ox + fw < self.sampler.screen_width:
+            fitted_left = min(fitted_left, ox + fw - src_w)
+        if oy > 0:
+            fitted_top = max(fitted_top, oy)
+        if oy + fh < self.sampler.screen_height:
+            fitted_top = min(fitted_top, oy + fh - src_h)
+        if (fitted_left, fitted_top) != (left, top):
+            self._prefetch_misses.inc()
+        return fitted_left, fitted_top
+
+    def magnify(self, left, top, src_w, src_h, out_w, out_h, zoom):
+        if self.frozen is not None:
+            return self.frozen.crop(zoom, left, top, src_w, src_h, out_w, out_h)
+        ox, oy = self.base_origin
+        return self.base_frame.crop((left - ox, top - oy, left - ox + src_w, top - oy + src_h)).resize((out_w, out_h), QUALITY_TIERS[self.quality])
+
     def paintEvent(self, event):
-        if self.mode == 'off' or not self.base_frame or self.over_menu: return
+        if self.mode == 'off' or self.over_menu: return
+        if not self.base_frame and (self.mode != 'full' or self.frozen is not None): return
+        t0 = time.perf_counter()
         painter = QtGui.QPainter(self)
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         
         cx, cy = self.mouse_pos.x(), self.mouse_pos.y()
+        if self.predict:
+            actual = self.cursor_source()
+            self.predictor.record(t0, actual.x(), actual.y())
+            px, py = self.predictor.predict(t0 + self._paint_lead)
+            cx, cy = round(px), round(py)
+        self.drawn_pos = (cx, cy)
         
         if self.mode == 'lens':
             d = self.lens_diameter
             r = d // 2
-            src_s = int(d / self.lens_zoom)
-            left, top = cx - src_s // 2, cy - src_s // 2
-            crop = self.base_frame.crop((left, top, left + src_s, top + src_s)).resize((d, d), Image.LANCZOS)
+            left, top, src_s, _ = self.source_rect(cx, cy)
+            left, top = self.fit_prefetch(left, top, src_s, src_s)
+            crop = self.magnify(left, top, src_s, src_s, d, d, self.lens_zoom)
             qimg = QtGui.QImage(crop.tobytes("raw", "RGB"), d, d, d*3, QtGui.QImage.Format_RGB888)
             path = QtGui.QPainterPath()
             path.addEllipse(cx-r, cy-r, d, d) 
@@ -284,25 +1142,227 @@ class OverlayWindow(QtWidgets.QWidget):
             w_screen = self.sampler.screen_width
             h_bar = self.bar_height
             
-            src_w = int(w_screen / self.bar_zoom)
-            src_h = int(h_bar / self.bar_zoom)
+            left, top, src_w, src_h = self.source_rect(cx, cy)
+            left, top = self.fit_prefetch(left, top, src_w, src_h)
             
-            left = cx - (cx / self.bar_zoom)
-            top = cy - (h_bar / 2 / self.bar_zoom)
-            
-            crop = self.base_frame.crop((left, top, left + src_w, top + src_h)).resize((w_screen, h_bar), Image.LANCZOS)
+            crop = self.magnify(left, top, src_w, src_h, w_screen, h_bar, self.bar_zoom)
             qimg = QtGui.QImage(crop.tobytes("raw", "RGB"), w_screen, h_bar, w_screen*3, QtGui.QImage.Format_RGB888)
             
             painter.drawImage(0, cy-h_bar//2, qimg)
             painter.setPen(QtGui.QPen(QtGui.QColor(255,255,255,60), 1))
             painter.drawLine(0, cy-h_bar//2, w_screen, cy-h_bar//2)
             painter.drawLine(0, cy+h_bar//2, w_screen, cy+h_bar//2)
+        
+        elif self.mode == 'full':
+            view = self.frozen_view if self.frozen_view is not None else self.viewport
+            if view.image is not None:
+                self.drawn_pos = (round(self.target_pos[0]), round(self.target_pos[1]))
+                painter.drawImage(0, 0, view.image)
+        
+        painter.end()
+        now = time.perf_counter()
+        self._paint_ms.observe((now - t0) * 1000.0)
+        self._paint_lead = 0.8 * self._paint_lead + 0.2 * (now - t0)
+        if self._tick_time is not None:
+            self._lead = 0.8 * self._lead + 0.2 * (now - self._tick_time)
+        actual = self.cursor_source()
+        self.last_lag = math.hypot(actual.x() - self.drawn_pos[0], actual.y() - self.drawn_pos[1])
+        self._lag_px.observe(self.last_lag)
+
+class ScriptedCursor:
+    def __init__(self, width, height, period=BENCH_PATH_SECONDS):
+        self.width = width
+        self.height = height
+        self.period = period
+        self.start = time.perf_counter()
+
+    def __call__(self):
+        t = 2.0 * math.pi * (time.perf_counter() - self.start) / self.period
+        x = self.width / 2 + self.width * 0.4 * math.sin(3 * t)
+        y = self.height / 2 + self.height * 0.4 * math.sin(2 * t + 0.5)
+        return QtCore.QPoint(int(x), int(y))
+
+def _bench_run(overlay, target, frames, alloc_frames=BENCH_ALLOC_FRAMES):
+    # Frames are timed with tracemalloc off; allocations come from a separate,
+    # shorter traced pass so tracing overhead never shows up in the percentiles.
+    frame_ms = []
+    lag = []
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        overlay.on_draw_tick()
+        overlay.render(target)
+        frame_ms.append((time.perf_counter() - t0) * 1000.0)
+        lag.append(overlay.last_lag)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    alloc = 0
+    alloc_frames = min(alloc_frames, frames)
+    if alloc_frames:
+        tracemalloc.start()
+        for _ in range(alloc_frames):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            overlay.on_draw_tick()
+            overlay.render(target)
+            alloc += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+    frame_ms.sort()
+    lag.sort()
+    pick = lambda values, q: values[min(len(values) - 1, int(q * len(values)))]
+    return {
+        "p50": pick(frame_ms, 0.5),
+        "p95": pick(frame_ms, 0.95),
+        "p99": pick(frame_ms, 0.99),
+        "lag50": pick(lag, 0.5),
+        "lag95": pick(lag, 0.95),
+        "fps": len(frame_ms) / wall,
+        "alloc_kib": alloc / alloc_frames / 1024.0 if alloc_frames else 0.0,
+        "cpu": 100.0 * cpu / wall,
+    }
+
+def run_render_benchmark(resolutions=tuple(BENCH_RESOLUTIONS), sources=BENCH_SOURCES, modes=BENCH_MODES, zooms=BENCH_ZOOMS, frames=120, freeze=False, predict=True):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    print(f"{'res':<6} {'source':<7} {'mode':<11} {'zoom':>4} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'lag px':>6} {'lag95':>6} {'fps':>6} {'py KiB/f':>9} {'cpu %':>6}")
+    results = []
+    for res in resolutions:
+        width, height = BENCH_RESOLUTIONS[res]
+        for kind in sources:
+            sampler = SyntheticSampler(width, height, kind)
+            overlay = OverlayWindow(sampler, cursor_source=ScriptedCursor(width, height), predict=predict, offscreen=True)
+            overlay.draw_timer.stop()
+            target = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+            for frozen in ((False, True) if freeze else (False,)):
+                if frozen:
+                    overlay.toggle_freeze()
+                for mode in modes:
+                    overlay.set_mode(mode)
+                    label = f"{mode}{'+freeze' if frozen else ''}"
+                    for zoom in zooms:
+                        overlay.set_param('zoom', zoom)
+                        if overlay.frozen is not None:
+                            overlay.frozen.wait()
+                        r = _bench_run(overlay, target, frames)
+                        r.update({"res": res, "source": kind, "mode": label, "zoom": zoom})
+                        results.append(r)
+                        print(f"{res:<6} {kind:<7} {label:<11} {zoom:>4.1f} {r['p50']:>7.2f} {r['p95']:>7.2f} {r['p99']:>7.2f} {r['lag50']:>6.1f} {r['lag95']:>6.1f} {r['fps']:>6.1f} {r['alloc_kib']:>9.1f} {r['cpu']:>6.0f}")
+            overlay.dispose()
+            app.processEvents()
+    return results
+
+def calibrate_magnifier(sampler, frames=CALIBRATE_FRAMES, headroom=CALIBRATE_HEADROOM):
+    width, height = sampler.screen_width, sampler.screen_height
+    overlay = OverlayWindow(sampler, cursor_source=ScriptedCursor(width, height), offscreen=True)
+    overlay.draw_timer.stop()
+    target = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    frame_ms = {}
+    for quality in QUALITY_TIERS:
+        overlay.set_quality(quality)
+        worst = 0.0
+        for mode in BENCH_MODES:
+            overlay.set_mode(mode)
+            worst = max(worst, _bench_run(overlay, target, frames, alloc_frames=0)["p95"])
+        frame_ms[quality] = worst
+        if worst <= DRAW_INTERVAL_MS * headroom:
+            break
+    overlay.dispose()
+    
+    fitting = [i for i in DRAW_INTERVALS_MS if worst <= i * headroom]
+    return {
+        "quality": quality,
+        "draw_interval_ms": fitting[0] if fitting else DRAW_INTERVALS_MS[-1],
+        "frame_ms": frame_ms,
+        "screen": [width, height],
+        "calibrated_at": time.time(),
+    }
+
+def run_calibration(settings, sampler):
+    result = calibrate_magnifier(sampler)
+    settings.calibration = result
+    settings.update(quality=result["quality"], draw_interval_ms=result["draw_interval_ms"])
+    path = settings.save()
+    for quality, ms in result["frame_ms"].items():
+        print(f"{quality:<7} p95 {ms:7.2f} ms")
+    print(f"picked quality={result['quality']} interval={result['draw_interval_ms']} ms ({path})")
+    return result
+
+def run_soak(hours=SOAK_HOURS, resolution="1440p", memory_budget=None):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    width, height = BENCH_RESOLUTIONS[resolution]
+    sampler = SyntheticSampler(width, height, "text")
+    overlay = OverlayWindow(sampler, cursor_source=ScriptedCursor(width, height), memory_budget=memory_budget, offscreen=True)
+    overlay.draw_timer.stop()
+    overlay.memory_timer.stop()
+    target = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    
+    interval = min(SOAK_SAMPLE_SECONDS, hours * 3600.0 / SOAK_MIN_SAMPLES)
+    cycle = len(BENCH_MODES) * len(BENCH_ZOOMS)
+    start = time.monotonic()
+    end = start + hours * 3600.0
+    next_sample = start
+    samples = []
+    frames = 0
+    while time.monotonic() < end:
+        if frames % SOAK_MODE_FRAMES == 0:
+            step = frames // SOAK_MODE_FRAMES
+            if overlay.frozen is not None:
+                overlay.toggle_freeze()
+            if step % cycle == 0 and time.monotonic() >= next_sample:
+                rss = overlay.watchdog.check()
+                elapsed = time.monotonic() - start
+                samples.append((elapsed, rss))
+                print(f"{elapsed / 60:8.1f} min  rss {rss / 1048576:8.1f} MB  frames {frames}", flush=True)
+                next_sample += interval
+            overlay.set_mode(BENCH_MODES[step % len(BENCH_MODES)])
+            overlay.set_param('zoom', BENCH_ZOOMS[step % len(BENCH_ZOOMS)])
+            if step % 4 == 2:
+                overlay.toggle_freeze()
+        overlay.on_draw_tick()
+        overlay.render(target)
+        app.processEvents()
+        frames += 1
+    overlay.dispose()
+    ok, growth = soak_verdict(samples)
+    print(f"{'PASS' if ok else 'FAIL'}: steady-state RSS growth {growth:+.1f} MB (limit {SOAK_MAX_GROWTH_MB:.0f} MB)")
+    return ok
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Screen magnifier overlay.")
+    parser.add_argument("--bench", action="store_true", help="run the headless rendering benchmark with synthetic screens and exit")
+    parser.add_argument("--bench-resolutions", nargs="+", choices=tuple(BENCH_RESOLUTIONS), default=list(BENCH_RESOLUTIONS))
+    parser.add_argument("--bench-sources", nargs="+", choices=BENCH_SOURCES, default=list(BENCH_SOURCES))
+    parser.add_argument("--bench-modes", nargs="+", choices=BENCH_MODES, default=list(BENCH_MODES))
+    parser.add_argument("--bench-zooms", nargs="+", type=float, default=list(BENCH_ZOOMS))
+    parser.add_argument("--bench-frames", type=int, default=120, help="frames per benchmark configuration")
+    parser.add_argument("--bench-freeze", action="store_true", help="also benchmark each mode over a frozen snapshot")
+    parser.add_argument("--memory-budget", type=float, default=None, metavar="MB", help="shed the freeze cache, the scroll buffer and finally quality when RSS stays above this budget")
+    parser.add_argument("--soak", type=float, nargs="?", const=SOAK_HOURS, default=None, metavar="HOURS", help=f"replay a scripted session headlessly for HOURS (default {SOAK_HOURS:.0f}) and fail if memory grows")
+    parser.add_argument("--calibrate", action="store_true", help="measure frame times on this screen and save the quality tier and frame rate to use")
+    parser.add_argument("--no-calibrate", action="store_true", help="skip the one-time calibration on first launch")
+    parser.add_argument("--bench-no-predict", action="store_true", help="disable cursor prediction to measure the baseline lag")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.bench:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        run_render_benchmark(args.bench_resolutions, args.bench_sources, args.bench_modes, args.bench_zooms, args.bench_frames, args.bench_freeze, not args.bench_no_predict)
+        return
+    if args.soak is not None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        sys.exit(0 if run_soak(args.soak, memory_budget=args.memory_budget) else 1)
+    
+    settings = SettingsStore("magnifier", MAGNIFIER_SETTINGS, limits=MAGNIFIER_LIMITS).load()
+    app = QtWidgets.QApplication(sys.argv)
+    sampler = ScreenSampler()
+    if args.calibrate or (settings.calibration is None and not args.no_calibrate):
+        run_calibration(settings, sampler)
+    overlay = OverlayWindow(sampler, sampler.grab_full(), settings=settings, memory_budget=args.memory_budget)
+    overlay.show()
+    overlay.menu.show()
+    screen_geo = QtGui.QGuiApplication.primaryScreen().geometry()
+    overlay.menu.move(screen_geo.width() - 400, screen_geo.height() - 600)
+    sys.exit(app.exec())
 
-app = QtWidgets.QApplication(sys.argv)
-sampler = ScreenSampler()
-overlay = OverlayWindow(sampler, sampler.grab_full())
-overlay.show()
-overlay.menu.show()
-screen_geo = QtGui.QGuiApplication.primaryScreen().geometry()
-overlay.menu.move(screen_geo.width() - 400, screen_geo.height() - 600)
-sys.exit(app.exec())
+if __name__ == "__main__":
+    main()